@@ -0,0 +1,197 @@
+#!/usr/bin/env python3
+from typing import Any, Callable, Dict, List, Tuple
+import os
+import sys
+import re
+import json
+import time
+import random
+import pathlib
+import argparse
+import tempfile
+import subprocess
+import grep
+
+GREP = str(pathlib.Path(__file__).resolve().parent / 'grep.py')
+NEEDLE = 'needle'
+WORDS = ['alpha', 'beta', 'gamma', 'delta', 'request', 'handled', 'user', 'error', 'info',
+         'warning', 'session', 'timeout', 'cache', 'miss', 'hit', 'db', 'query', 'ms']
+
+# Every mode is a list of grep.py arguments. FILE is replaced by the corpus,
+# FILES by several copies of it to benchmark multi-file search.
+MODES: Dict[str, List[str]] = {
+    'substring': [NEEDLE, 'FILE'],
+    'regex': ['-E', NEEDLE + '[0-9]+$', 'FILE'],
+    'count': ['-c', NEEDLE, 'FILE'],
+    'mmap': ['--engine', 'mmap', NEEDLE, 'FILE'],
+    'mmap-count': ['--engine', 'mmap', '-c', NEEDLE, 'FILE'],
+    'multi-file': [NEEDLE, 'FILES'],
+    'multi-file-parallel': ['-j', str(os.cpu_count() or 1), NEEDLE, 'FILES'],
+}
+
+
+def random_ids(count: int, length: int, rng: random.Random) -> List[str]:
+    return [''.join(rng.choice('0123456789abcdef') for _ in range(length))
+            for _ in range(count)]
+
+
+def make_lines(ids: List[str], lines: int, density: float, rng: random.Random) -> List[str]:
+    """Generates log-like lines, a density fraction of them contains one of ids."""
+    result = []
+    for i in range(lines):
+        line = f'{i} INFO request handled in {rng.randrange(1000)} ms'
+        if rng.random() < density:
+            line += f' id={rng.choice(ids)}'
+        result.append(line)
+    return result
+
+
+def write_corpus(path: pathlib.Path, size: int, line_length: int, density: float,
+                 rng: random.Random) -> int:
+    """Writes about size bytes of lines of line_length characters to path,
+    a density fraction of lines ends with NEEDLE and a number. Returns the number of lines."""
+    lines = 0
+    written = 0
+    with path.open('w', encoding=grep.ENCODING, newline='\n') as out_file:
+        while written < size:
+            line = ' '.join(rng.choices(WORDS, k=line_length // 4))[:line_length]
+            if rng.random() < density:
+                line = f'{line[:max(0, line_length - 16)]} {NEEDLE}{rng.randrange(10 ** 6)}'
+            out_file.write(line + '\n')
+            written += len(line) + 1
+            lines += 1
+    return lines
+
+
+def mode_args(mode: str, corpus: str, copies: int) -> List[str]:
+    args = []
+    for arg in MODES[mode]:
+        if arg == 'FILE':
+            args.append(corpus)
+        elif arg == 'FILES':
+            args.extend([corpus] * copies)
+        else:
+            args.append(arg)
+    return args
+
+
+def run_grep(args: List[str]) -> Tuple[float, int]:
+    """Runs grep.py in a separate process with output discarded.
+    Returns wall time in seconds and peak RSS of the process in bytes. Unix only.
+    Raises CalledProcessError if grep.py fails or is killed by a signal (e.g. out of memory),
+    with a negative return code in the latter case, as subprocess does."""
+    command = [sys.executable, GREP] + args
+    start = time.perf_counter()
+    pid = os.posix_spawn(sys.executable, command, os.environ,
+                         file_actions=[(os.POSIX_SPAWN_OPEN, 1, os.devnull, os.O_WRONLY, 0)])
+    _, status, usage = os.wait4(pid, 0)  # type: ignore  # pylint: disable=no-member
+    seconds = time.perf_counter() - start
+    if os.WIFSIGNALED(status):
+        raise subprocess.CalledProcessError(-os.WTERMSIG(status), command)
+    if os.WEXITSTATUS(status) != 0:
+        raise subprocess.CalledProcessError(os.WEXITSTATUS(status), command)
+    # ru_maxrss is in kilobytes on Linux, but in bytes on macOS.
+    return seconds, usage.ru_maxrss * (1 if sys.platform == 'darwin' else 1024)
+
+
+def bench_modes(args: argparse.Namespace, workdir: pathlib.Path) -> List[Dict[str, Any]]:
+    """Runs every mode on every corpus and returns a list of measurements.
+    The best of args.repeat runs is taken to reduce noise."""
+    rng = random.Random(args.seed)
+    results = []
+    for size_mb in args.sizes:
+        for line_length in args.line_lengths:
+            for density in args.densities:
+                corpus = workdir / f'corpus-{size_mb}-{line_length}-{density}.txt'
+                lines = write_corpus(corpus, int(size_mb * 2 ** 20), line_length, density, rng)
+                size = corpus.stat().st_size
+                for mode in args.modes:
+                    copies = args.copies if 'FILES' in MODES[mode] else 1
+                    runs = [run_grep(mode_args(mode, str(corpus), copies))
+                            for _ in range(args.repeat)]
+                    seconds = min(run[0] for run in runs)
+                    results.append({
+                        'mode': mode,
+                        'size_bytes': size * copies,
+                        'lines': lines * copies,
+                        'line_length': line_length,
+                        'density': density,
+                        'seconds': seconds,
+                        'mb_per_s': size * copies / 2 ** 20 / seconds,
+                        'lines_per_s': lines * copies / seconds,
+                        'peak_rss_bytes': max(run[1] for run in runs),
+                    })
+                    print_result(results[-1])
+                corpus.unlink()
+    return results
+
+
+def print_result(result: Dict[str, Any]) -> None:
+    print(f'{result["mode"]:>20} {result["size_bytes"] / 2 ** 20:>8.1f} MB '
+          f'len={result["line_length"]:<5} density={result["density"]:<6} '
+          f'{result["mb_per_s"]:>8.1f} MB/s {result["lines_per_s"]:>10.0f} lines/s '
+          f'{result["peak_rss_bytes"] / 2 ** 20:>7.1f} MB RSS')
+
+
+def measure(matcher: grep.Matcher, lines: List[str]) -> float:
+    """Returns lines per second processed by matcher."""
+    start = time.perf_counter()
+    for line in lines:
+        matcher(line)
+    return len(lines) / (time.perf_counter() - start)
+
+
+def alternation_matcher(patterns: List[str]) -> grep.Matcher:
+    pattern = re.compile('|'.join(map(re.escape, patterns)))
+    return lambda line: pattern.search(line) is not None
+
+
+def bench_multi_patterns(pattern_counts: List[int], lines: int, seed: int) -> None:
+    """Compares Aho-Corasick search of many fixed strings with one alternation regex."""
+    rng = random.Random(seed)
+    print(f'{"patterns":>10} {"aho-corasick, lines/s":>22} {"alternation, lines/s":>22}')
+    for count in pattern_counts:
+        ids = random_ids(count, 12, rng)
+        text = make_lines(ids, lines, 0.01, rng)
+        makers: List[Callable[[List[str]], grep.Matcher]] = [
+            lambda patterns: grep.make_multi_matcher(patterns, regex=False),
+            alternation_matcher,
+        ]
+        speeds = [measure(make(ids), text) for make in makers]
+        print(f'{count:>10} {speeds[0]:>22.0f} {speeds[1]:>22.0f}')
+
+
+def main(args_str: List[str]) -> None:
+    parser = argparse.ArgumentParser(description='Benchmarks of grep.py search modes.')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    modes = subparsers.add_parser('modes', help='run grep.py modes on synthetic corpora')
+    modes.add_argument('--sizes', type=float, nargs='+', default=[16, 128], metavar='MB')
+    modes.add_argument('--line-lengths', type=int, nargs='+', default=[80, 1000])
+    modes.add_argument('--densities', type=float, nargs='+', default=[0.0001, 0.1])
+    modes.add_argument('--modes', nargs='+', choices=list(MODES), default=list(MODES))
+    modes.add_argument('--copies', type=int, default=4,
+                       help='number of files in multi-file modes')
+    modes.add_argument('--repeat', type=int, default=3)
+    modes.add_argument('--seed', type=int, default=123456)
+    modes.add_argument('--workdir', help='where to put corpora, a temporary directory by default')
+    modes.add_argument('--json', help='write results to this file')
+
+    patterns = subparsers.add_parser('patterns', help='compare multi-pattern search methods')
+    patterns.add_argument('--patterns', type=int, nargs='+', default=[1, 10, 100, 1000, 10000])
+    patterns.add_argument('--lines', type=int, default=20000)
+    patterns.add_argument('--seed', type=int, default=123456)
+
+    args = parser.parse_args(args_str)
+    if args.command == 'patterns':
+        bench_multi_patterns(args.patterns, args.lines, args.seed)
+        return
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        results = bench_modes(args, pathlib.Path(args.workdir or tmp_dir))
+    if args.json:
+        with open(args.json, 'w', encoding=grep.ENCODING) as out_file:
+            json.dump({'python': sys.version, 'results': results}, out_file, indent=2)
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
@@ -1,29 +1,631 @@
 #!/usr/bin/env python3
-from typing import List
+from typing import (IO, Any, BinaryIO, Callable, Dict, Iterable, Iterator, List, NamedTuple,
+                    Optional, Sequence, TextIO, Tuple, Union)
 import sys
+import os
 import re
+import json
+import mmap
+import zlib
+import codecs
+import tempfile
 import argparse
+import contextlib
+import collections
+import multiprocessing
+# Plain strings and required literals are found in the parse tree of the regex engine.
+# Its parser is private: re._parser and re._constants since Python 3.11, sre_parse and
+# sre_constants before (they are deprecated aliases since). Only parse_top_level
+# and LITERAL use it.
+try:
+    from re import _constants as sre_constants  # type: ignore  # Python 3.11+
+    from re import _parser as sre_parse  # type: ignore
+except ImportError:
+    import sre_constants  # pylint: disable=deprecated-module
+    import sre_parse  # pylint: disable=deprecated-module
+
+LITERAL = sre_constants.LITERAL  # pylint: disable=no-member  # created at runtime
+
+CHUNK_SIZE = 1 << 16
+ENCODING = 'utf-8'
+FINGERPRINT_SIZE = 64
+
+Matcher = Callable[[str], bool]
+Buffer = Union[bytes, mmap.mmap]
+Span = Tuple[int, int]
+SpanFinder = Callable[[Buffer, int, int], Optional[Span]]
+Text = Union[str, Buffer]
+FileState = Dict[str, int]
+
+
+def read_chunks(in_file: IO[Any], chunk_size: int = CHUNK_SIZE,
+                limit: Optional[int] = None) -> Iterator[Any]:
+    """Yields chunks of in_file of at most chunk_size characters (or bytes)
+    until the end of file or until limit characters are read."""
+    while limit is None or limit > 0:
+        chunk = in_file.read(chunk_size if limit is None else min(chunk_size, limit))
+        if not chunk:
+            break
+        if limit is not None:
+            limit -= len(chunk)
+        yield chunk
+
+
+def decode_chunks(chunks: Iterable[bytes]) -> Iterator[str]:
+    """Decodes chunks, a character may be split between two chunks."""
+    decoder = codecs.getincrementaldecoder(ENCODING)()
+    for chunk in chunks:
+        yield decoder.decode(chunk)
+    yield decoder.decode(b'', final=True)
+
+
+def split_lines(chunks: Iterable[str]) -> Iterator[str]:
+    """Yields lines of text given by chunks without trailing '\\n'.
+    A line split between two chunks is glued back,
+    so only one chunk and one incomplete line are kept in memory."""
+    # Pieces of the incomplete line are joined only once its end is found:
+    # gluing them chunk by chunk would make a long line quadratic.
+    pieces: List[str] = []
+    for chunk in chunks:
+        lines = chunk.split('\n')
+        tail = lines.pop()
+        if lines:
+            pieces.append(lines[0])
+            lines[0] = ''.join(pieces)
+            pieces.clear()
+            yield from lines
+        if tail:
+            pieces.append(tail)
+    if pieces:
+        yield ''.join(pieces)
+
+
+def read_lines(in_file: TextIO, chunk_size: int = CHUNK_SIZE) -> Iterator[str]:
+    """Reads in_file by chunks of chunk_size characters and yields its lines
+    without trailing '\\n'."""
+    return split_lines(read_chunks(in_file, chunk_size))
+
+
+def parse_top_level(pattern: str) -> Optional[List[Tuple[Any, Any]]]:
+    """Returns (opcode, argument) pairs of the top level of pattern as parsed by the regex
+    engine, or None if pattern is case-insensitive and its literals cannot be compared as is."""
+    parsed = sre_parse.parse(pattern)
+    if parsed.state.flags & re.IGNORECASE:
+        return None
+    return list(parsed)
+
+
+def literal_runs(pattern: str) -> Optional[List[str]]:
+    """Returns runs of consecutive literal characters in the top level of pattern,
+    so every match of pattern contains all of them. Returns None if pattern
+    is case-insensitive and literals cannot be compared as is."""
+    parsed = parse_top_level(pattern)
+    if parsed is None:
+        return None
+    runs = ['']
+    for op, arg in parsed:
+        if op == LITERAL:
+            runs[-1] += chr(arg)
+        elif runs[-1]:
+            runs.append('')
+    return runs
+
+
+def parse_literal(pattern: str) -> Optional[str]:
+    """Returns the only string matched by pattern or None if it is not a plain string."""
+    parsed = parse_top_level(pattern)
+    if parsed is None or any(op != LITERAL for op, _ in parsed):
+        return None
+    return ''.join(chr(arg) for _, arg in parsed)
+
+
+def required_literal(pattern: str) -> str:
+    """Returns the longest string contained in every match of pattern, possibly empty."""
+    return max(literal_runs(pattern) or [''], key=len)
+
+
+def make_matcher(needle: str, regex: bool) -> Matcher:
+    """Returns a function checking whether a line contains needle.
+    A regex is compiled once. If it is a plain string, substring search is used instead;
+    otherwise lines without its required literal are rejected before running the regex."""
+    if regex:
+        literal = parse_literal(needle)
+        if literal is None:
+            pattern = re.compile(needle)
+            required = required_literal(needle)
+            if required:
+                return lambda line: required in line and pattern.search(line) is not None
+            return lambda line: pattern.search(line) is not None
+        needle = literal
+    return lambda line: needle in line
+
+
+def line_span(buf: Buffer, start: int, end: int, pos: int) -> Span:
+    """Returns bounds of the line of buf[start:end] containing position pos,
+    without the trailing '\\n'. start must be a beginning of a line."""
+    newline = buf.rfind(b'\n', start, pos)
+    line_start = start if newline < 0 else newline + 1
+    line_end = buf.find(b'\n', pos, end)
+    return line_start, end if line_end < 0 else line_end
+
+
+def make_span_finder(needle: str, regex: bool) -> SpanFinder:
+    """Returns a function which finds the first line of buf[pos:end] containing needle.
+    Plain strings are searched as raw bytes. For a regex the bytes are only scanned
+    for its required literal, and every candidate line is decoded, stripped of '\\r'
+    and checked by the str pattern, so lines match exactly as in make_matcher."""
+    literal = parse_literal(needle) if regex else needle
+    if literal is None:
+        pattern = re.compile(needle)
+        # Without a required literal every line is a candidate.
+        required = required_literal(needle).encode(ENCODING)
+
+        def find_regex(buf: Buffer, pos: int, end: int) -> Optional[Span]:
+            while True:
+                hit = buf.find(required, pos, end)
+                if hit < 0:
+                    return None
+                span = line_span(buf, pos, end, hit)
+                if pattern.search(decode_line(buf, span)):
+                    return span
+                pos = span[1] + 1
+        return find_regex
+
+    needle_bytes = literal.encode(ENCODING)
+
+    def find_substring(buf: Buffer, pos: int, end: int) -> Optional[Span]:
+        hit = buf.find(needle_bytes, pos, end)
+        return None if hit < 0 else line_span(buf, pos, end, hit)
+    return find_substring
+
+
+def bytes_searchable(patterns: List[str], regex: bool) -> bool:
+    """Checks whether scanning raw bytes pays off for patterns: every regex has to be
+    ASCII and have a required literal, otherwise nearly every line would be decoded
+    anyway and the lines engine is used instead."""
+    return all(pattern.isascii() and required_literal(pattern)
+               for pattern in split_literals(patterns, regex)[1])
+
+
+class Automaton(NamedTuple):
+    """Aho-Corasick automaton: a trie of patterns with failure links.
+    terminal[state] is True if some pattern ends at state or at any of its suffixes."""
+    goto: List[Dict[Any, int]]
+    fail: List[int]
+    terminal: List[bool]
+
+
+def build_automaton(patterns: Iterable[Sequence[Any]]) -> Automaton:
+    """Builds an automaton searching for all patterns at once.
+    Patterns are sequences of symbols: characters of str or ints of bytes."""
+    goto: List[Dict[Any, int]] = [{}]
+    terminal = [False]
+    for pattern in patterns:
+        state = 0
+        for symbol in pattern:
+            if symbol not in goto[state]:
+                goto[state][symbol] = len(goto)
+                goto.append({})
+                terminal.append(False)
+            state = goto[state][symbol]
+        terminal[state] = True
+
+    fail = [0] * len(goto)
+    queue = collections.deque(goto[0].values())
+    while queue:
+        state = queue.popleft()
+        for symbol, next_state in goto[state].items():
+            fallback = fail[state]
+            while fallback and symbol not in goto[fallback]:
+                fallback = fail[fallback]
+            fail[next_state] = goto[fallback].get(symbol, 0)
+            terminal[next_state] = terminal[next_state] or terminal[fail[next_state]]
+            queue.append(next_state)
+    return Automaton(goto, fail, terminal)
+
+
+def automaton_find(automaton: Automaton, text: Text, start: int = 0,
+                   end: Optional[int] = None) -> int:
+    """Returns the end of the first occurrence of any pattern in text[start:end] or -1.
+    Runs in one pass over text regardless of the number of patterns."""
+    goto, fail, terminal = automaton
+    if terminal[0]:
+        return start
+    state = 0
+    for pos in range(start, len(text) if end is None else end):
+        symbol = text[pos]
+        while state and symbol not in goto[state]:
+            state = fail[state]
+        state = goto[state].get(symbol, 0)
+        if terminal[state]:
+            return pos + 1
+    return -1
+
+
+def split_literals(patterns: List[str], regex: bool) -> Tuple[List[str], List[str]]:
+    """Splits patterns into plain strings and real regular expressions."""
+    if not regex:
+        return patterns, []
+    literals = []
+    regexes = []
+    for pattern in patterns:
+        literal = parse_literal(pattern)
+        if literal is None:
+            regexes.append(pattern)
+        else:
+            literals.append(literal)
+    return literals, regexes
+
+
+def make_multi_matcher(patterns: List[str], regex: bool) -> Matcher:
+    """Returns a function checking whether a line contains any of patterns.
+    All plain strings are searched by a single Aho-Corasick automaton."""
+    if len(patterns) == 1:
+        return make_matcher(patterns[0], regex)
+    literals, regexes = split_literals(patterns, regex)
+    matchers = [make_matcher(pattern, regex=True) for pattern in regexes]
+    if literals:
+        automaton = build_automaton(literals)
+        matchers.append(lambda line: automaton_find(automaton, line) >= 0)
+    if len(matchers) == 1:
+        return matchers[0]
+    return lambda line: any(matcher(line) for matcher in matchers)
+
+
+def make_multi_span_finder(patterns: List[str], regex: bool) -> SpanFinder:
+    """Same as make_span_finder, but finds the first line containing any of patterns."""
+    if len(patterns) == 1:
+        return make_span_finder(patterns[0], regex)
+    literals, regexes = split_literals(patterns, regex)
+    finders = [make_span_finder(pattern, regex=True) for pattern in regexes]
+    if literals:
+        automaton = build_automaton(literal.encode(ENCODING) for literal in literals)
+
+        def find_automaton(buf: Buffer, pos: int, end: int) -> Optional[Span]:
+            found = automaton_find(automaton, buf, pos, end)
+            return None if found < 0 else line_span(buf, pos, end, max(found - 1, pos))
+        finders.append(find_automaton)
+
+    # The next span of every finder from the last searched position. Lines are searched
+    # in order, so a finder is queried again only after the line it found has been passed:
+    # otherwise every regex match would restart all other finders, which is quadratic.
+    cache: List[Any] = [None, -1, -1, []]  # buf, end, pos, spans
+
+    def find_first(buf: Buffer, pos: int, end: int) -> Optional[Span]:
+        cached_buf, cached_end, cached_pos, spans = cache
+        if buf is not cached_buf or end != cached_end or pos < cached_pos:
+            spans = [find_span(buf, pos, end) for find_span in finders]
+        else:
+            spans = [find_span(buf, pos, end) if span is not None and span[0] < pos else span
+                     for find_span, span in zip(finders, spans)]
+        cache[:] = [buf, end, pos, spans]
+        return min((span for span in spans if span is not None), default=None)
+    return find_first
+
+
+def iter_line_spans(buf: Buffer, find_span: SpanFinder,
+                    end: Optional[int] = None, start: int = 0) -> Iterator[Span]:
+    """Yields bounds of all lines of buf[start:end] found by find_span, in order.
+    start must be a beginning of a line."""
+    pos = start
+    end = len(buf) if end is None else end
+    while pos < end:
+        span = find_span(buf, pos, end)
+        if span is None or span[0] >= end:
+            return
+        yield span
+        pos = span[1] + 1
+
+
+def decode_line(buf: Buffer, span: Span) -> str:
+    return strip_cr(buf[span[0]:span[1]].decode(ENCODING))
+
+
+def strip_cr(line: str) -> str:
+    """Removes '\\r' left from a '\\r\\n' line break in a file read as bytes."""
+    return line[:-1] if line.endswith('\r') else line
+
+
+def filter_lines(lines: Iterable[str], matcher: Matcher) -> Iterator[str]:
+    return (line for line in lines if matcher(line))
+
+
+def print_lines(lines: Iterable[str], prefix: str = '') -> None:
+    for line in lines:
+        print(prefix + line)
+
+
+def count_lines(lines: Iterable[Any]) -> int:
+    return sum(1 for _ in lines)
+
+
+def grep_stream(in_file: TextIO, matcher: Matcher, count: bool, prefix: str = '') -> None:
+    """Prints lines of in_file accepted by matcher (or their number if count is set)
+    as soon as they are read, each line prefixed with prefix."""
+    grep_lines(read_lines(in_file), matcher, count, prefix)
+
+
+def grep_lines(lines: Iterable[str], matcher: Matcher, count: bool, prefix: str = '') -> None:
+    found = filter_lines(lines, matcher)
+    if count:
+        print(f'{prefix}{count_lines(found)}')
+    else:
+        print_lines(found, prefix)
+
+
+def count_stream(in_file: BinaryIO, find_span: SpanFinder, chunk_size: int = CHUNK_SIZE,
+                 limit: Optional[int] = None) -> int:
+    """Counts lines of in_file (at most limit bytes of it) found by find_span
+    without decoding them. Each chunk is searched up to its last newline,
+    the rest is carried to the next one."""
+    count = 0
+    # As in split_lines, pieces of the incomplete line are joined once its end is found.
+    pieces: List[bytes] = []
+    for chunk in read_chunks(in_file, chunk_size, limit):
+        newline = chunk.rfind(b'\n')
+        if newline < 0:
+            pieces.append(chunk)
+            continue
+        pieces.append(chunk)
+        buf = b''.join(pieces) if len(pieces) > 1 else chunk
+        end = len(buf) - len(chunk) + newline + 1
+        count += count_lines(iter_line_spans(buf, find_span, end))
+        pieces = [buf[end:]]
+    return count + count_lines(iter_line_spans(b''.join(pieces), find_span))
+
+
+def grep_mapped(name: str, find_span: SpanFinder, count: bool, prefix: str = '',
+                start: int = 0, end: Optional[int] = None) -> None:
+    """Same as grep_stream, but maps the file into memory and decodes
+    only the lines found by find_span. Only bytes [start:end) are searched."""
+    with open(name, 'rb') as in_file:
+        grep_mapped_file(in_file, find_span, count, prefix, start, end)
+
+
+def grep_mapped_file(in_file: BinaryIO, find_span: SpanFinder, count: bool, prefix: str = '',
+                     start: int = 0, end: Optional[int] = None) -> None:
+    """Same as grep_mapped for an already open file."""
+    if end is None:
+        end = os.fstat(in_file.fileno()).st_size
+    if end <= start:
+        # Empty files cannot be mapped.
+        if count:
+            print(f'{prefix}0')
+        return
+    with mmap.mmap(in_file.fileno(), 0, access=mmap.ACCESS_READ) as buf:
+        spans = iter_line_spans(buf, find_span, end, start)
+        if count:
+            print(f'{prefix}{count_lines(spans)}')
+        else:
+            print_lines((decode_line(buf, span) for span in spans), prefix)
+
+
+def complete_lines_end(in_file: BinaryIO, start: int, end: int,
+                       chunk_size: int = CHUNK_SIZE) -> int:
+    """Returns the position right after the last '\\n' in bytes [start:end) of in_file
+    or start if there is none. Reads the file backwards from end."""
+    pos = end
+    while pos > start:
+        chunk_start = max(start, pos - chunk_size)
+        in_file.seek(chunk_start)
+        newline = in_file.read(pos - chunk_start).rfind(b'\n')
+        if newline >= 0:
+            return chunk_start + newline + 1
+        pos = chunk_start
+    return start
+
+
+def fingerprint(in_file: BinaryIO, offset: int) -> int:
+    """Returns a checksum of up to FINGERPRINT_SIZE bytes right before offset."""
+    start = max(0, offset - FINGERPRINT_SIZE)
+    in_file.seek(start)
+    return zlib.crc32(in_file.read(offset - start))
+
+
+def resume_offset(since: Optional[FileState], stat: os.stat_result, in_file: BinaryIO) -> int:
+    """Returns the offset to continue scanning a file from. Starts from scratch
+    if the file is new, was replaced by another one (rotated) or truncated.
+    A truncated file may have grown past the old offset already (copytruncate rotation),
+    so the bytes before the offset are compared with the saved fingerprint too.
+    States saved without a fingerprint are trusted."""
+    if since is None or since['inode'] != stat.st_ino or since['offset'] > stat.st_size:
+        return 0
+    if 'fingerprint' in since and fingerprint(in_file, since['offset']) != since['fingerprint']:
+        return 0
+    return since['offset']
+
+
+def load_offsets(state_file: str) -> Dict[str, FileState]:
+    try:
+        with open(state_file, 'r', encoding=ENCODING) as in_file:
+            return json.load(in_file)
+    except FileNotFoundError:
+        return {}
+
+
+def save_offsets(state_file: str, offsets: Dict[str, FileState]) -> None:
+    """Atomically replaces state_file, so an interrupted run keeps the old state."""
+    with open(state_file + '.tmp', 'w', encoding=ENCODING) as out_file:
+        json.dump(offsets, out_file)
+    os.replace(state_file + '.tmp', state_file)
+
+
+class Search(NamedTuple):
+    """Everything needed to search one file, built once from command line arguments.
+    find_span is set if lines can be searched as raw bytes: either the mmap engine
+    is chosen and patterns are bytes_searchable, or only lines are counted
+    and patterns are plain strings."""
+    matcher: Matcher
+    find_span: Optional[SpanFinder]
+    count_only: bool
+    use_mmap: bool
+    follow: bool
+
+
+def make_search(args: argparse.Namespace) -> Search:
+    use_mmap = args.engine == 'mmap'
+    plain = not split_literals(args.needles, args.regex)[1]
+    find_span = None
+    if (use_mmap and bytes_searchable(args.needles, args.regex)) or (args.count and plain):
+        find_span = make_multi_span_finder(args.needles, args.regex)
+    return Search(make_multi_matcher(args.needles, args.regex), find_span, args.count, use_mmap,
+                  args.state_file is not None)
+
+
+def read_patterns(args: argparse.Namespace) -> Optional[List[str]]:
+    """Returns patterns given by -e and -f options or None if there are none.
+    Every line of a -e value or of a pattern file is a separate pattern."""
+    if args.patterns is None and args.pattern_files is None:
+        return None
+    patterns = []
+    for pattern in args.patterns or []:
+        patterns.extend(pattern.split('\n'))
+    for name in args.pattern_files or []:
+        with open(name, 'r', encoding=ENCODING) as in_file:
+            patterns.extend(read_lines(in_file))
+    return patterns
+
+
+def grep_stdin(search: Search) -> None:
+    stdin_bytes = getattr(sys.stdin, 'buffer', None)
+    if search.count_only and search.find_span is not None and stdin_bytes is not None:
+        print(count_stream(stdin_bytes, search.find_span))
+        return
+    grep_stream(sys.stdin, search.matcher, search.count_only)
+
+
+def grep_file_since(name: str, search: Search, prefix: str,
+                    since: Optional[FileState]) -> FileState:
+    """Searches only complete lines appended to the file since the state since
+    and returns the state to continue from next time."""
+    with open(name, 'rb') as in_bytes:
+        stat = os.fstat(in_bytes.fileno())
+        start = resume_offset(since, stat, in_bytes)
+        end = complete_lines_end(in_bytes, start, stat.st_size)
+        if search.find_span is not None and search.use_mmap:
+            grep_mapped_file(in_bytes, search.find_span, search.count_only, prefix, start, end)
+        elif search.find_span is not None:
+            in_bytes.seek(start)
+            print(f'{prefix}{count_stream(in_bytes, search.find_span, limit=end - start)}')
+        else:
+            in_bytes.seek(start)
+            chunks = decode_chunks(read_chunks(in_bytes, limit=end - start))
+            lines = (strip_cr(line) for line in split_lines(chunks))
+            grep_lines(lines, search.matcher, search.count_only, prefix)
+        return {'inode': stat.st_ino, 'offset': end, 'fingerprint': fingerprint(in_bytes, end)}
+
+
+def grep_file(name: str, search: Search, prefix: str = '',
+              since: Optional[FileState] = None) -> Optional[FileState]:
+    """Searches the file. In follow mode returns its new state (see grep_file_since)."""
+    if search.follow:
+        return grep_file_since(name, search, prefix, since)
+    if search.find_span is not None:
+        if search.use_mmap and os.path.isfile(name):
+            grep_mapped(name, search.find_span, search.count_only, prefix)
+            return None
+        if search.count_only:
+            with open(name, 'rb') as in_bytes:
+                print(f'{prefix}{count_stream(in_bytes, search.find_span)}')
+            return None
+    with open(name, 'r', encoding=ENCODING) as in_file:
+        grep_stream(in_file, search.matcher, search.count_only, prefix)
+    return None
+
+
+worker_search: Optional[Search] = None
+worker_output_dir: Optional[str] = None
+
+
+def init_worker(args: argparse.Namespace, output_dir: str) -> None:
+    """Builds the search once per worker process: matchers cannot be pickled.
+    Output of files is written to temporary files in output_dir."""
+    global worker_search, worker_output_dir
+    worker_search = make_search(args)
+    worker_output_dir = output_dir
+
+
+FileTask = Tuple[str, str, Optional[FileState]]
+
+
+def grep_file_to_temp(task: FileTask) -> Tuple[str, Optional[FileState]]:
+    """Runs grep_file in a worker process and returns the name of a temporary file
+    with its output and its result. The output is not kept in memory, so it may be
+    as large as the file itself."""
+    assert worker_search is not None
+    fd, path = tempfile.mkstemp(dir=worker_output_dir)
+    with open(fd, 'w', encoding=ENCODING) as out_file, contextlib.redirect_stdout(out_file):
+        state = grep_file(task[0], worker_search, task[1], task[2])
+    return path, state
+
+
+def grep_files_parallel(tasks: List[FileTask], args: argparse.Namespace,
+                        jobs: int) -> List[Optional[FileState]]:
+    """Runs grep_file for (file, prefix, since) tasks in a pool of jobs processes.
+    Output of every file is printed as a whole in the order of files. It is passed
+    through temporary files and copied by chunks, so memory does not depend on it."""
+    states = []
+    with tempfile.TemporaryDirectory() as output_dir, \
+            multiprocessing.Pool(jobs, initializer=init_worker,
+                                 initargs=(args, output_dir)) as pool:
+        for path, state in pool.imap(grep_file_to_temp, tasks):
+            with open(path, 'r', encoding=ENCODING) as in_file:
+                for chunk in read_chunks(in_file):
+                    sys.stdout.write(chunk)
+            os.remove(path)
+            states.append(state)
+    return states
 
 
 def main(args_str: List[str]):
     parser = argparse.ArgumentParser()
-    parser.add_argument('needle', type=str)
+    parser.add_argument('needle', type=str, nargs='?')
     parser.add_argument('files', nargs='*')
     parser.add_argument('-E', dest='regex', action='store_true')
+    parser.add_argument('-c', dest='count', action='store_true')
+    parser.add_argument('-e', dest='patterns', action='append', metavar='PATTERN',
+                        help='search for PATTERN; can be repeated')
+    parser.add_argument('-f', dest='pattern_files', action='append', metavar='PATTERNFILE',
+                        help='search for patterns from PATTERNFILE, one per line')
+    parser.add_argument('--engine', choices=['lines', 'mmap'], default='lines',
+                        help='how to search regular files: decode them line by line '
+                             'or map them into memory and search raw bytes')
+    parser.add_argument('-j', dest='jobs', type=int, default=1,
+                        help='number of processes searching files in parallel')
+    parser.add_argument('--follow', '--since-offset', dest='state_file', metavar='STATEFILE',
+                        help='search only lines appended since the previous run '
+                             'with the same STATEFILE, which keeps offsets of files')
     args = parser.parse_args(args_str)
+    if args.jobs < 1:
+        parser.error('number of jobs should be positive')
+    patterns = read_patterns(args)
+    if patterns is None:
+        if args.needle is None:
+            parser.error('the following arguments are required: needle')
+        args.needles = [args.needle]
+    else:
+        if args.needle is not None:
+            args.files.insert(0, args.needle)
+        args.needles = patterns
 
-    # STUB BEGINS
-    for line in sys.stdin.readlines():
-        line = line.rstrip('\n')
-        if args.needle in line:
-            print('Found needle in ' + line)
-
-    with open('input.txt', 'r') as in_file:
-        for line in in_file.readlines():
-            line = line.rstrip('\n')
-            if re.search(args.needle, line):
-                print(f'Found re in {line}')
-    # STUB ENDS
+    if not args.files:
+        if args.state_file is not None:
+            parser.error('--follow requires files')
+        grep_stdin(make_search(args))
+        return
+    offsets = load_offsets(args.state_file) if args.state_file is not None else {}
+    tasks = [(name, f'{name}:' if len(args.files) > 1 else '', offsets.get(name))
+             for name in args.files]
+    if args.jobs > 1 and len(tasks) > 1:
+        states = grep_files_parallel(tasks, args, min(args.jobs, len(tasks)))
+    else:
+        search = make_search(args)
+        states = [grep_file(name, search, prefix, since) for name, prefix, since in tasks]
+    if args.state_file is not None:
+        for name, state in zip(args.files, states):
+            assert state is not None
+            offsets[name] = state
+        save_offsets(args.state_file, offsets)
 
 
 if __name__ == '__main__':
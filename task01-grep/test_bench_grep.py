@@ -0,0 +1,70 @@
+import os
+import json
+import random
+import signal
+import subprocess
+import pytest
+import bench_grep
+
+
+def test_write_corpus(tmp_path):
+    path = tmp_path / 'corpus.txt'
+    lines = bench_grep.write_corpus(path, 1000, 40, 1.0, random.Random(1))
+    text = path.read_text().split('\n')
+    assert text.pop() == ''
+    assert len(text) == lines
+    assert sum(len(line) + 1 for line in text) >= 1000
+    assert all(bench_grep.NEEDLE in line for line in text)
+    bench_grep.write_corpus(path, 1000, 40, 0.0, random.Random(1))
+    assert bench_grep.NEEDLE not in path.read_text()
+
+
+def test_mode_args():
+    assert bench_grep.mode_args('count', 'a.txt', 3) == ['-c', 'needle', 'a.txt']
+    assert bench_grep.mode_args('multi-file', 'a.txt', 3) == ['needle', 'a.txt', 'a.txt', 'a.txt']
+
+
+@pytest.mark.skipif(not hasattr(os, 'wait4'), reason='needs os.wait4')
+def test_integrate_bench_modes(tmp_path, capsys):
+    bench_grep.main(['modes', '--sizes', '0.01', '--line-lengths', '50', '--densities', '0.5',
+                     '--modes', 'substring', 'multi-file', '--copies', '2', '--repeat', '1',
+                     '--workdir', str(tmp_path), '--json', str(tmp_path / 'out.json')])
+    assert len(capsys.readouterr().out.split('\n')) == 3
+    with open(tmp_path / 'out.json', encoding='utf-8') as in_file:
+        results = json.load(in_file)['results']
+    assert [result['mode'] for result in results] == ['substring', 'multi-file']
+    assert results[1]['size_bytes'] == 2 * results[0]['size_bytes']
+    assert all(result['peak_rss_bytes'] > 0 and result['mb_per_s'] > 0 for result in results)
+    assert [path.name for path in tmp_path.iterdir()] == ['out.json']
+
+
+@pytest.mark.skipif(not hasattr(os, 'wait4'), reason='needs os.wait4')
+def test_run_grep_fails_on_error_and_signal(tmp_path, monkeypatch):
+    seconds, rss = bench_grep.run_grep(['needle', os.devnull])
+    assert seconds > 0 and rss > 0
+    with pytest.raises(subprocess.CalledProcessError) as info:
+        bench_grep.run_grep(['needle', str(tmp_path / 'missing.txt')])
+    assert info.value.returncode == 1
+    script = tmp_path / 'killed.py'
+    script.write_text('import os, signal\nos.kill(os.getpid(), signal.SIGKILL)\n')
+    monkeypatch.setattr(bench_grep, 'GREP', str(script))
+    with pytest.raises(subprocess.CalledProcessError) as info:
+        bench_grep.run_grep([])
+    assert info.value.returncode == -signal.SIGKILL
+
+
+def test_integrate_bench_patterns(capsys):
+    bench_grep.main(['patterns', '--patterns', '1', '10', '--lines', '100'])
+    out = capsys.readouterr().out.split('\n')
+    assert out.pop() == ''
+    assert out[0].split()[0] == 'patterns'
+    assert [line.split()[0] for line in out[1:]] == ['1', '10']
+    assert all(float(speed) > 0 for line in out[1:] for speed in line.split()[1:])
+
+
+def test_make_lines():
+    ids = bench_grep.random_ids(3, 12, random.Random(1))
+    assert len(ids) == 3 and all(len(id_) == 12 for id_ in ids)
+    lines = bench_grep.make_lines(ids, 10, 1.0, random.Random(1))
+    assert len(lines) == 10
+    assert all(line.split('id=')[1] in ids for line in lines)
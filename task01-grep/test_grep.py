@@ -1,8 +1,18 @@
 #!/usr/bin/env python3
 import io
+import os
+import zlib
+import argparse
+import pytest
 import grep
 
 
+def make_args(**kwargs):
+    args = dict(needles=['ne'], regex=False, count=False, engine='lines', state_file=None)
+    args.update(kwargs)
+    return argparse.Namespace(**args)
+
+
 def test_integrate_stdin_grep(monkeypatch, capsys):
     monkeypatch.setattr('sys.stdin', io.StringIO(
         'pref needle?\nneedle? suf\nthe needl\npref needle? suf'))
@@ -57,3 +67,534 @@ def test_integrate_files_grep_count(tmp_path, monkeypatch, capsys):
     out, err = capsys.readouterr()
     assert err == ''
     assert out == 'b.txt:1\na.txt:2\n'
+
+
+def test_read_lines_glues_lines_split_between_chunks():
+    in_file = io.StringIO('first line\nsecond\n\nthird line')
+    assert list(grep.read_lines(in_file, chunk_size=3)) == [
+        'first line', 'second', '', 'third line']
+
+
+def test_read_lines_trailing_newline():
+    assert list(grep.read_lines(io.StringIO('a\nb\n'), chunk_size=1)) == ['a', 'b']
+    assert not list(grep.read_lines(io.StringIO('')))
+
+
+def test_read_lines_is_lazy():
+    in_file = io.StringIO('match\n' + 'x' * 100)
+    lines = grep.read_lines(in_file, chunk_size=8)
+    assert next(lines) == 'match'
+    assert in_file.tell() == 8
+
+
+def test_make_matcher_substring():
+    matcher = grep.make_matcher('a.c', regex=False)
+    assert matcher('xa.cx')
+    assert not matcher('abc')
+
+
+def test_make_matcher_regex():
+    matcher = grep.make_matcher('a.c', regex=True)
+    assert matcher('xa.cx')
+    assert matcher('abc')
+    assert not matcher('ac')
+
+
+def test_filter_lines():
+    matcher = grep.make_matcher('b', regex=False)
+    assert list(grep.filter_lines(['ab', 'cd', 'bb'], matcher)) == ['ab', 'bb']
+
+
+def test_print_lines(capsys):
+    grep.print_lines(['a', 'b'], prefix='f:')
+    out, err = capsys.readouterr()
+    assert err == ''
+    assert out == 'f:a\nf:b\n'
+
+
+def test_count_lines():
+    assert grep.count_lines(iter(['a', 'b', 'c'])) == 3
+    assert grep.count_lines([]) == 0
+
+
+def test_grep_stream(capsys):
+    matcher = grep.make_matcher('ne', regex=False)
+    grep.grep_stream(io.StringIO('one\ntwo\nnine\n'), matcher, count=False, prefix='x:')
+    grep.grep_stream(io.StringIO('one\ntwo\nnine\n'), matcher, count=True, prefix='x:')
+    out, err = capsys.readouterr()
+    assert err == ''
+    assert out == 'x:one\nx:nine\nx:2\n'
+
+
+def test_line_span():
+    buf = b'ab\ncd\nef'
+    assert grep.line_span(buf, 0, len(buf), 4) == (3, 5)
+    assert grep.line_span(buf, 0, len(buf), 7) == (6, 8)
+    assert grep.line_span(buf, 3, len(buf), 3) == (3, 5)
+    assert grep.line_span(buf, 0, 5, 3) == (3, 5)
+
+
+def test_iter_line_spans_substring():
+    buf = b'needle\nhay\nhay needle needle\nhay'
+    spans = list(grep.iter_line_spans(buf, grep.make_span_finder('needle', regex=False)))
+    assert spans == [(0, 6), (11, 28)]
+
+
+def test_iter_line_spans_regex_does_not_cross_lines():
+    buf = b'xa\nbx\na b\nab'
+    spans = list(grep.iter_line_spans(buf, grep.make_span_finder(r'a\sb', regex=True)))
+    assert spans == [(6, 9)]
+
+
+def test_iter_line_spans_regex_anchors():
+    buf = b'ab\ncab\nb\n'
+    assert list(grep.iter_line_spans(buf, grep.make_span_finder('^a', regex=True))) == [
+        (0, 2)]
+    assert list(grep.iter_line_spans(buf, grep.make_span_finder('b$', regex=True))) == [
+        (0, 2), (3, 6), (7, 8)]
+
+
+def test_iter_line_spans_empty_match_skips_missing_last_line():
+    buf = b'a\n\nb\n'
+    spans = list(grep.iter_line_spans(buf, grep.make_span_finder('x*', regex=True)))
+    assert spans == [(0, 1), (2, 2), (3, 4)]
+
+
+def test_iter_line_spans_regex_crlf_and_non_ascii():
+    buf = 'abc\r\nxabc\r\ncafè\nnaïve\nété\nx\n'.encode('utf-8')
+    spans = list(grep.iter_line_spans(buf, grep.make_span_finder('abc$', regex=True)))
+    assert spans == [(0, 4), (5, 10)]
+    spans = list(grep.iter_line_spans(buf, grep.make_span_finder('[éx]', regex=True)))
+    assert [grep.decode_line(buf, span) for span in spans] == ['xabc', 'été', 'x']
+    spans = list(grep.iter_line_spans(buf, grep.make_span_finder('^.{3}$', regex=True)))
+    assert [grep.decode_line(buf, span) for span in spans] == ['abc', 'été']
+
+
+def test_decode_line():
+    buf = 'ы\nab\r\n'.encode('utf-8')
+    assert grep.decode_line(buf, (0, 2)) == 'ы'
+    assert grep.decode_line(buf, (3, 6)) == 'ab'
+
+
+def test_grep_mapped(tmp_path, capsys):
+    (tmp_path / 'a.txt').write_bytes(b'one\ntwo\nnine')
+    (tmp_path / 'empty.txt').write_bytes(b'')
+    find_span = grep.make_span_finder('ne', regex=False)
+    grep.grep_mapped(str(tmp_path / 'a.txt'), find_span, count=False, prefix='x:')
+    grep.grep_mapped(str(tmp_path / 'a.txt'), find_span, count=True, prefix='x:')
+    grep.grep_mapped(str(tmp_path / 'empty.txt'), find_span, count=False)
+    grep.grep_mapped(str(tmp_path / 'empty.txt'), find_span, count=True)
+    out, err = capsys.readouterr()
+    assert err == ''
+    assert out == 'x:one\nx:nine\nx:2\n0\n'
+
+
+def test_grep_mapped_file_uses_open_file(tmp_path, capsys):
+    (tmp_path / 'a.txt').write_bytes(b'one\ntwo\nnine')
+    find_span = grep.make_span_finder('ne', regex=False)
+    with (tmp_path / 'a.txt').open('rb') as in_file:
+        (tmp_path / 'a.txt').rename(tmp_path / 'a.txt.1')
+        (tmp_path / 'a.txt').write_bytes(b'none\n')
+        grep.grep_mapped_file(in_file, find_span, count=False, start=4)
+    assert capsys.readouterr().out == 'nine\n'
+
+
+def test_integrate_files_mmap_engine_matches_lines_engine(tmp_path, monkeypatch, capsys):
+    (tmp_path / 'a.txt').write_text('pref needle\nneedle suf\n')
+    (tmp_path / 'b.txt').write_text('the needl\npref needle suf')
+    monkeypatch.chdir(tmp_path)
+    for args in (['needle'], ['-c', 'needle'], ['-E', 'ne+dle?$'], ['-c', '-E', '^n']):
+        grep.main(args + ['b.txt', 'a.txt'])
+        expected = capsys.readouterr()
+        grep.main(['--engine', 'mmap'] + args + ['b.txt', 'a.txt'])
+        assert capsys.readouterr() == expected
+
+
+def test_integrate_mmap_engine_regex_parity(tmp_path, monkeypatch, capsys):
+    (tmp_path / 'a.txt').write_bytes('abc\r\nxabc\r\ncafè\nnaïve\nété\n'.encode('utf-8'))
+    monkeypatch.chdir(tmp_path)
+    for args in (['-E', 'abc$'], ['-c', '-E', 'abc$'], ['-E', '[éx]'], ['-E', '^.{3}$'],
+                 ['-c', '-E', 'na.ve'], ['-E', '-e', 'é', '-e', 'c$']):
+        grep.main(args + ['a.txt'])
+        expected = capsys.readouterr()
+        grep.main(['--engine', 'mmap'] + args + ['a.txt'])
+        assert capsys.readouterr() == expected
+
+
+def test_grep_file(tmp_path, capsys):
+    (tmp_path / 'a.txt').write_text('one\ntwo\nnine\n')
+    for engine in ('lines', 'mmap'):
+        grep.grep_file(str(tmp_path / 'a.txt'), grep.make_search(make_args(engine=engine)), 'x:')
+        out, err = capsys.readouterr()
+        assert err == ''
+        assert out == 'x:one\nx:nine\n'
+
+
+def test_grep_file_to_temp(tmp_path):
+    (tmp_path / 'a.txt').write_text('one\ntwo\nnine\n')
+    (tmp_path / 'out').mkdir()
+    grep.init_worker(make_args(count=True), str(tmp_path / 'out'))
+    path, state = grep.grep_file_to_temp((str(tmp_path / 'a.txt'), 'x:', None))
+    assert state is None
+    assert os.path.dirname(path) == str(tmp_path / 'out')
+    with open(path, 'r', encoding='utf-8') as in_file:
+        assert in_file.read() == 'x:2\n'
+
+
+def test_grep_files_parallel_removes_temporary_files(tmp_path, monkeypatch, capsys):
+    (tmp_path / 'a.txt').write_text('needle a\n' * 1000)
+    (tmp_path / 'b.txt').write_text('needle b\n')
+    monkeypatch.setattr('tempfile.tempdir', str(tmp_path))
+    tasks = [(str(tmp_path / 'a.txt'), '', None), (str(tmp_path / 'b.txt'), '', None)]
+    assert grep.grep_files_parallel(tasks, make_args(needles=['needle']), 2) == [None, None]
+    assert capsys.readouterr().out == 'needle a\n' * 1000 + 'needle b\n'
+    assert sorted(path.name for path in tmp_path.iterdir()) == ['a.txt', 'b.txt']
+
+
+def test_integrate_files_parallel_keeps_order(tmp_path, monkeypatch, capsys):
+    names = [f'{i}.txt' for i in range(10)]
+    for i, name in enumerate(names):
+        (tmp_path / name).write_text(f'needle {i}\nhay\n' * (10 - i))
+    monkeypatch.chdir(tmp_path)
+    for args in (['needle'], ['-c', 'needle'], ['--engine', 'mmap', 'needle']):
+        grep.main(args + names + names[:2])
+        expected = capsys.readouterr()
+        grep.main(['-j', '3'] + args + names + names[:2])
+        assert capsys.readouterr() == expected
+
+
+def test_integrate_bad_jobs(capsys):
+    with pytest.raises(SystemExit):
+        grep.main(['-j', '0', 'needle', 'a.txt'])
+    assert 'number of jobs should be positive' in capsys.readouterr().err
+
+
+def test_parse_top_level():
+    parsed = grep.parse_top_level('ab+')
+    assert parsed is not None
+    assert [op == grep.LITERAL for op, _ in parsed] == [True, False]
+    assert parsed[0][1] == ord('a')
+    assert grep.parse_top_level('(?i)ab') is None
+
+
+def test_literal_runs():
+    assert grep.literal_runs(r'ab\.c+d*x(y|z)\d') == ['ab.', 'x', '']
+    assert grep.literal_runs('a|b') == ['']
+    assert grep.literal_runs('(?i)abc') is None
+
+
+def test_parse_literal():
+    assert grep.parse_literal(r'a\.b\[') == 'a.b['
+    assert grep.parse_literal('') == ''
+    assert grep.parse_literal('a.b') is None
+    assert grep.parse_literal('^ab') is None
+    assert grep.parse_literal('(?i)ab') is None
+
+
+def test_required_literal():
+    assert grep.required_literal(r'x\d+needle?') == 'needl'
+    assert grep.required_literal('(a|b)*') == ''
+    assert grep.required_literal('(?i)abc') == ''
+
+
+def test_make_matcher_regex_with_required_literal():
+    matcher = grep.make_matcher(r'id=\d+;', regex=True)
+    assert matcher('a id=123; b')
+    assert not matcher('a id=; b')
+    assert not matcher('no literal')
+
+
+def test_make_matcher_regex_literal():
+    matcher = grep.make_matcher(r'a\.b', regex=True)
+    assert matcher('xa.by')
+    assert not matcher('xaxby')
+
+
+def test_iter_line_spans_regex_with_required_literal():
+    buf = b'id=1;\nid=;\nx id=23; id=\n'
+    spans = list(grep.iter_line_spans(buf, grep.make_span_finder(r'id=\d+;', regex=True)))
+    assert spans == [(0, 5), (11, 23)]
+    spans = list(grep.iter_line_spans(buf, grep.make_span_finder(r'id=;', regex=True)))
+    assert spans == [(6, 10)]
+
+
+def test_multi_span_finder_mixed_patterns_is_linear(monkeypatch):
+    calls = []
+    automaton_find = grep.automaton_find
+    monkeypatch.setattr(grep, 'automaton_find',
+                        lambda *args: calls.append(args) or automaton_find(*args))
+    find_span = grep.make_multi_span_finder(['x[0-9]', 'foo', 'bar'], regex=True)
+    buf = b''.join(b'x1\n' if i % 50 else b'foo\n' for i in range(1, 1000))
+    spans = list(grep.iter_line_spans(buf, find_span))
+    assert len(spans) == 999
+    assert spans[49] == (49 * 3, 49 * 3 + 3)
+    # The literal scan is restarted only after each of its 19 matches, not after every line.
+    assert len(calls) == 20
+    assert list(grep.iter_line_spans(b'bar\nx2\n', find_span)) == [(0, 3), (4, 6)]
+
+
+def test_automaton_find():
+    automaton = grep.build_automaton(['he', 'she', 'hers', 'his'])
+    assert grep.automaton_find(automaton, 'ushers') == 4
+    assert grep.automaton_find(automaton, 'ushers', start=2) == 4
+    assert grep.automaton_find(automaton, 'ahis') == 4
+    assert grep.automaton_find(automaton, 'hhxs') == -1
+    assert grep.automaton_find(automaton, 'ushers', end=3) == -1
+
+
+def test_automaton_find_uses_failure_links():
+    automaton = grep.build_automaton(['abcd', 'bce'])
+    assert grep.automaton_find(automaton, 'xabce') == 5
+    assert grep.automaton_find(automaton, 'abcabcd') == 7
+
+
+def test_automaton_find_bytes_and_empty_pattern():
+    automaton = grep.build_automaton([b'ab', b'\xd1\x8b'])
+    assert grep.automaton_find(automaton, 'xы'.encode('utf-8')) == 3
+    assert grep.automaton_find(grep.build_automaton(['', 'a']), 'xyz', start=1) == 1
+    assert grep.automaton_find(grep.build_automaton([]), 'xyz') == -1
+
+
+def test_split_literals():
+    assert grep.split_literals(['a.b', 'c'], regex=False) == (['a.b', 'c'], [])
+    assert grep.split_literals([r'a\.b', 'c+', 'd'], regex=True) == (['a.b', 'd'], ['c+'])
+
+
+def test_make_multi_matcher():
+    matcher = grep.make_multi_matcher(['foo', 'ba.', r'x\d'], regex=True)
+    assert matcher('a foo b')
+    assert matcher('bar')
+    assert matcher('x1')
+    assert not matcher('fo b x')
+    matcher = grep.make_multi_matcher(['foo', 'ba.'], regex=False)
+    assert matcher('ba.')
+    assert not matcher('bar')
+    assert not grep.make_multi_matcher([], regex=False)('anything')
+
+
+def test_make_multi_span_finder():
+    buf = b'abc\nx1\nfoo bar\nnothing\nbaz'
+    find_span = grep.make_multi_span_finder(['foo', 'ba.', r'x\d'], regex=True)
+    assert list(grep.iter_line_spans(buf, find_span)) == [(4, 6), (7, 14), (23, 26)]
+    find_span = grep.make_multi_span_finder(['thing', 'abc'], regex=False)
+    assert list(grep.iter_line_spans(buf, find_span)) == [(0, 3), (15, 22)]
+
+
+def test_read_patterns(tmp_path):
+    (tmp_path / 'p.txt').write_text('a\nb\n')
+    args = argparse.Namespace(patterns=['x', 'y\nz'], pattern_files=[str(tmp_path / 'p.txt')])
+    assert grep.read_patterns(args) == ['x', 'y', 'z', 'a', 'b']
+    assert grep.read_patterns(argparse.Namespace(patterns=None, pattern_files=None)) is None
+
+
+def test_integrate_multiple_patterns(tmp_path, monkeypatch, capsys):
+    (tmp_path / 'a.txt').write_text('id 1\nid 22\nid 3\n')
+    (tmp_path / 'ids.txt').write_text('22\n3\n')
+    monkeypatch.chdir(tmp_path)
+    for engine in ('lines', 'mmap'):
+        grep.main(['--engine', engine, '-e', '1', '-f', 'ids.txt', 'a.txt', 'a.txt'])
+        out, err = capsys.readouterr()
+        assert err == ''
+        assert out == 'a.txt:id 1\na.txt:id 22\na.txt:id 3\n' * 2
+        grep.main(['--engine', engine, '-E', '-e', r'2$', '-e', '1', 'a.txt'])
+        out, err = capsys.readouterr()
+        assert err == ''
+        assert out == 'id 1\nid 22\n'
+
+
+def test_integrate_stdin_multiple_patterns(monkeypatch, capsys):
+    monkeypatch.setattr('sys.stdin', io.StringIO('alpha\nbeta\ngamma\n'))
+    grep.main(['-c', '-e', 'ph', '-e', 'mm'])
+    out, err = capsys.readouterr()
+    assert err == ''
+    assert out == '2\n'
+
+
+def test_integrate_no_needle(capsys):
+    with pytest.raises(SystemExit):
+        grep.main([])
+    assert 'required: needle' in capsys.readouterr().err
+
+
+def test_count_stream_handles_lines_split_between_chunks():
+    text = b'a needle\nhay\nneedle needle\nneedl\ne\nlast needle'
+    find_span = grep.make_span_finder('needle', regex=False)
+    for chunk_size in (1, 2, 5, 100):
+        assert grep.count_stream(io.BytesIO(text), find_span, chunk_size) == 3
+    assert grep.count_stream(io.BytesIO(b''), find_span) == 0
+
+
+def test_make_search_uses_bytes_for_plain_counts():
+    def search(**kwargs):
+        kwargs.setdefault('count', True)
+        return grep.make_search(make_args(**kwargs))
+    assert search().find_span is not None
+    assert search(count=False).find_span is None
+    assert search(regex=True, needles=['n.']).find_span is None
+    assert search(regex=True, needles=[r'n\.']).find_span is not None
+    assert search(count=False, engine='mmap').use_mmap
+    assert search(regex=True, needles=['n.'], engine='mmap').find_span is not None
+    assert search(regex=True, needles=['.'], engine='mmap').find_span is None
+    assert search(regex=True, needles=['[éx]'], engine='mmap').find_span is None
+
+
+def test_bytes_searchable():
+    assert grep.bytes_searchable(['é', 'n.'], regex=True)
+    assert grep.bytes_searchable(['.*'], regex=False)
+    assert not grep.bytes_searchable(['n.', 'x*'], regex=True)
+    assert not grep.bytes_searchable(['é.'], regex=True)
+
+
+def test_grep_stdin_counts_raw_bytes(monkeypatch, capsys):
+    stdin = io.TextIOWrapper(io.BytesIO(b'pref needle\nneedle suf\nthe needl\n'))
+    monkeypatch.setattr('sys.stdin', stdin)
+    grep.grep_stdin(grep.make_search(make_args(needles=['needle'], count=True)))
+    out, err = capsys.readouterr()
+    assert err == ''
+    assert out == '2\n'
+
+
+def test_integrate_files_grep_count_regex(tmp_path, monkeypatch, capsys):
+    (tmp_path / 'a.txt').write_text('pref needle\nneedle suf\n')
+    (tmp_path / 'b.txt').write_text('the needl\npref needle suf')
+    monkeypatch.chdir(tmp_path)
+    grep.main(['-c', '-E', 'needle?$', 'b.txt', 'a.txt'])
+    out, err = capsys.readouterr()
+    assert err == ''
+    assert out == 'b.txt:1\na.txt:1\n'
+
+
+def test_read_chunks_limit():
+    assert list(grep.read_chunks(io.BytesIO(b'abcdefg'), chunk_size=3)) == [b'abc', b'def', b'g']
+    assert list(grep.read_chunks(io.BytesIO(b'abcdefg'), chunk_size=3, limit=4)) == [
+        b'abc', b'd']
+
+
+def test_decode_chunks_glues_split_characters():
+    data = 'жук\n'.encode('utf-8')
+    assert ''.join(grep.decode_chunks([data[:1], data[1:3], data[3:]])) == 'жук\n'
+
+
+def test_split_lines():
+    assert list(grep.split_lines(['a\nb', 'c\n', '\nd'])) == ['a', 'bc', '', 'd']
+    assert list(grep.split_lines(['x'] * 1000 + ['y\nz', '', 'w'])) == ['x' * 1000 + 'y', 'zw']
+    assert list(grep.split_lines(['', '\n', ''])) == ['']
+
+
+def test_count_stream_long_lines():
+    text = b'x' * 1000 + b' needle\n' + b'y' * 1000 + b'\nneedle ' + b'z' * 1000
+    find_span = grep.make_span_finder('needle', regex=False)
+    for chunk_size in (1, 7, 100, 10000):
+        assert grep.count_stream(io.BytesIO(text), find_span, chunk_size) == 2
+
+
+def test_strip_cr():
+    assert grep.strip_cr('ab\r') == 'ab'
+    assert grep.strip_cr('a\rb') == 'a\rb'
+
+
+def test_complete_lines_end():
+    in_file = io.BytesIO(b'ab\ncd\nef')
+    assert grep.complete_lines_end(in_file, 0, 8) == 6
+    assert grep.complete_lines_end(in_file, 0, 8, chunk_size=1) == 6
+    assert grep.complete_lines_end(in_file, 6, 8, chunk_size=1) == 6
+    assert grep.complete_lines_end(in_file, 0, 5, chunk_size=2) == 3
+
+
+def test_resume_offset(tmp_path):
+    (tmp_path / 'a.txt').write_bytes(b'0123456789')
+    stat = (tmp_path / 'a.txt').stat()
+    with (tmp_path / 'a.txt').open('rb') as in_file:
+        assert grep.resume_offset(None, stat, in_file) == 0
+        assert grep.resume_offset({'inode': stat.st_ino, 'offset': 4}, stat, in_file) == 4
+        assert grep.resume_offset({'inode': stat.st_ino, 'offset': 11}, stat, in_file) == 0
+        assert grep.resume_offset({'inode': stat.st_ino + 1, 'offset': 4}, stat, in_file) == 0
+        since = {'inode': stat.st_ino, 'offset': 4, 'fingerprint': zlib.crc32(b'0123')}
+        assert grep.resume_offset(since, stat, in_file) == 4
+        since['fingerprint'] = zlib.crc32(b'abcd')
+        assert grep.resume_offset(since, stat, in_file) == 0
+
+
+def test_fingerprint(tmp_path):
+    (tmp_path / 'a.txt').write_bytes(b'x' * 10 + b'y' * grep.FINGERPRINT_SIZE)
+    with (tmp_path / 'a.txt').open('rb') as in_file:
+        assert grep.fingerprint(in_file, 0) == zlib.crc32(b'')
+        assert grep.fingerprint(in_file, 3) == zlib.crc32(b'xxx')
+        assert grep.fingerprint(in_file, 10 + grep.FINGERPRINT_SIZE) == \
+            zlib.crc32(b'y' * grep.FINGERPRINT_SIZE)
+
+
+def test_load_save_offsets(tmp_path):
+    state_file = str(tmp_path / 'state.json')
+    assert grep.load_offsets(state_file) == {}
+    grep.save_offsets(state_file, {'a.txt': {'inode': 1, 'offset': 2}})
+    assert grep.load_offsets(state_file) == {'a.txt': {'inode': 1, 'offset': 2}}
+    assert [path.name for path in tmp_path.iterdir()] == ['state.json']
+
+
+def test_grep_file_since(tmp_path, capsys):
+    name = str(tmp_path / 'a.txt')
+    (tmp_path / 'a.txt').write_bytes(b'one\r\ntwo\nnine\nnone')
+    inode = (tmp_path / 'a.txt').stat().st_ino
+    for kwargs in (dict(), dict(engine='mmap'), dict(count=True)):
+        search = grep.make_search(make_args(state_file='state.json', **kwargs))
+        since = {'inode': inode, 'offset': 5}
+        assert grep.grep_file_since(name, search, 'x:', since) == \
+            {'inode': inode, 'offset': 14, 'fingerprint': zlib.crc32(b'one\r\ntwo\nnine\n')}
+    out, err = capsys.readouterr()
+    assert err == ''
+    assert out == 'x:nine\nx:nine\nx:1\n'
+
+
+def test_integrate_follow(tmp_path, monkeypatch, capsys):
+    monkeypatch.chdir(tmp_path)
+    log = tmp_path / 'a.log'
+    for args in (['--follow', 'state'], ['--since-offset', 'state', '--engine', 'mmap']):
+        log.write_text('needle 1\nhay\n')
+        if (tmp_path / 'state').exists():
+            (tmp_path / 'state').unlink()
+        grep.main(args + ['needle', 'a.log'])
+        assert capsys.readouterr().out == 'needle 1\n'
+        grep.main(args + ['needle', 'a.log'])
+        assert capsys.readouterr().out == ''
+
+        with log.open('a') as out_file:
+            out_file.write('needle 2\nneedle 3')
+        grep.main(args + ['needle', 'a.log'])
+        assert capsys.readouterr().out == 'needle 2\n'
+        with log.open('a') as out_file:
+            out_file.write(' and more\n')
+        grep.main(args + ['-c', 'needle', 'a.log'])
+        assert capsys.readouterr().out == '1\n'
+
+        log.write_text('needle 4\n')
+        grep.main(args + ['needle', 'a.log'])
+        assert capsys.readouterr().out == 'needle 4\n'
+
+        # copytruncate rotation, the file grows past the old offset before the next run.
+        log.write_text('needle 7\nhay\nhay\n')
+        grep.main(args + ['needle', 'a.log'])
+        assert capsys.readouterr().out == 'needle 7\n'
+
+        log.rename(tmp_path / 'a.log.1')
+        log.write_text('needle 5\nneedle 6\n')
+        grep.main(args + ['needle', 'a.log'])
+        assert capsys.readouterr().out == 'needle 5\nneedle 6\n'
+
+
+def test_integrate_follow_parallel(tmp_path, monkeypatch, capsys):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / 'a.log').write_text('needle a\n')
+    (tmp_path / 'b.log').write_text('needle b\n')
+    grep.main(['-j', '2', '--follow', 'state', 'needle', 'a.log', 'b.log'])
+    assert capsys.readouterr().out == 'a.log:needle a\nb.log:needle b\n'
+    with (tmp_path / 'b.log').open('a') as out_file:
+        out_file.write('needle c\n')
+    grep.main(['-j', '2', '--follow', 'state', 'needle', 'a.log', 'b.log'])
+    assert capsys.readouterr().out == 'b.log:needle c\n'
+
+
+def test_integrate_follow_stdin(capsys):
+    with pytest.raises(SystemExit):
+        grep.main(['--follow', 'state', 'needle'])
+    assert '--follow requires files' in capsys.readouterr().err
@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+from typing import List, Tuple
+import sys
+import math
+import argparse
+import functools
+from fractions import Fraction
+import numpy as np
+import largest_heads_run_numpy
+
+FLIPS = 100
+SEED = 123456
+
+
+def count_without_run(flips: int, k: int) -> int:
+    """Returns the number of sequences of flips flips without k heads in a row.
+    A sequence of n >= k flips without such a run is a shorter one followed by a tail and
+    fewer than k heads, which gives a(n) = 2 * a(n - 1) - a(n - 1 - k) with a(-1) = 1."""
+    if k == 0:
+        return 0
+    counts = [1] + [2 ** n for n in range(min(flips, k - 1) + 1)]  # counts[n + 1] = a(n)
+    for n in range(k, flips + 1):
+        counts.append(2 * counts[n] - counts[n - k])
+    return counts[flips + 1]
+
+
+@functools.lru_cache(maxsize=16)
+def max_run_counts(flips: int) -> Tuple[int, ...]:
+    """Returns the numbers of sequences of flips flips whose longest run of heads equals
+    0, 1, ..., flips. Uses O(flips) memory, only a few final results are cached."""
+    below = [count_without_run(flips, k) for k in range(flips + 2)]
+    return tuple(below[k + 1] - below[k] for k in range(flips + 1))
+
+
+def max_run_distribution(flips: int) -> List[Fraction]:
+    """Returns exact probabilities that the longest run of heads in flips flips equals
+    0, 1, ..., flips."""
+    return [Fraction(count, 2 ** flips) for count in max_run_counts(flips)]
+
+
+def expected_max_run(flips: int) -> Fraction:
+    return sum((k * p for k, p in enumerate(max_run_distribution(flips))), Fraction(0))
+
+
+def max_run_std(flips: int) -> float:
+    """Standard deviation of the longest run of heads in flips flips."""
+    distribution = max_run_distribution(flips)
+    mean = expected_max_run(flips)
+    return math.sqrt(sum((k - mean) ** 2 * p for k, p in enumerate(distribution)))
+
+
+def check_simulation(iters: int, flips: int, seed: int) -> Tuple[float, float, float]:
+    """Runs a Monte Carlo simulation and compares it with the exact answer.
+    Returns the simulated mean, the exact mean and the difference in standard errors."""
+    rng = np.random.default_rng(seed)
+    mean = largest_heads_run_numpy.sum_max_runs(iters, flips, rng) / iters
+    exact = float(expected_max_run(flips))
+    return mean, exact, (mean - exact) / (max_run_std(flips) / math.sqrt(iters))
+
+
+def main(args_str: List[str]) -> None:
+    parser = argparse.ArgumentParser(
+        description='Exact distribution of the longest run of heads.')
+    parser.add_argument('--flips', type=int, default=FLIPS)
+    parser.add_argument('--check', type=int, metavar='ITERS',
+                        help='compare with a Monte Carlo simulation of ITERS series')
+    parser.add_argument('--seed', type=int, default=SEED)
+    args = parser.parse_args(args_str)
+
+    if args.check is not None:
+        mean, exact, z_score = check_simulation(args.check, args.flips, args.seed)
+        print(f'simulated {mean:.6f}, exact {exact:.6f}, {z_score:+.2f} standard errors')
+        return
+    for k, p in enumerate(max_run_distribution(args.flips)):
+        if p:
+            print(k, float(p))
+    print('expected', float(expected_max_run(args.flips)))
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
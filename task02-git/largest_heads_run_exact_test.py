@@ -0,0 +1,57 @@
+import itertools
+from fractions import Fraction
+from largest_heads_run_solution import get_max_run
+import largest_heads_run_exact
+
+
+def test_max_run_distribution_matches_enumeration() -> None:
+    for flips in range(8):
+        counts = [0] * (flips + 1)
+        for sequence in itertools.product([0, 1], repeat=flips):
+            counts[get_max_run(list(sequence))] += 1
+        expected = [Fraction(count, 2 ** flips) for count in counts]
+        assert largest_heads_run_exact.max_run_distribution(flips) == expected
+
+
+def test_count_without_run() -> None:
+    for flips in range(10):
+        for k in range(flips + 2):
+            expected = sum(get_max_run(list(sequence)) < k
+                           for sequence in itertools.product([0, 1], repeat=flips))
+            assert largest_heads_run_exact.count_without_run(flips, k) == expected
+
+
+def test_max_run_counts_is_memoized() -> None:
+    counts = largest_heads_run_exact.max_run_counts(5)
+    assert largest_heads_run_exact.max_run_counts(5) is counts
+    assert sum(counts) == 2 ** 5
+    assert counts[5] == 1
+
+
+def test_expected_max_run() -> None:
+    assert largest_heads_run_exact.expected_max_run(0) == 0
+    assert largest_heads_run_exact.expected_max_run(3) == Fraction(11, 8)
+    assert 5.99 < largest_heads_run_exact.expected_max_run(100) < 6
+
+
+def test_max_run_std() -> None:
+    # Values 0, 1, 1, 2 are equally likely for two flips.
+    assert abs(largest_heads_run_exact.max_run_std(2) - 0.5 ** 0.5) < 1e-9
+
+
+def test_check_simulation() -> None:
+    mean, exact, z_score = largest_heads_run_exact.check_simulation(100000, 20, 1)
+    assert exact == float(largest_heads_run_exact.expected_max_run(20))
+    assert abs(mean - exact) < 0.05
+    assert abs(z_score) < 4
+
+
+def test_main(capsys) -> None:
+    largest_heads_run_exact.main(['--flips', '2'])
+    out, err = capsys.readouterr()
+    assert err == ''
+    assert out == '0 0.25\n1 0.5\n2 0.25\nexpected 1.0\n'
+    largest_heads_run_exact.main(['--flips', '2', '--check', '100'])
+    out, err = capsys.readouterr()
+    assert err == ''
+    assert out.startswith('simulated ')
@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+from typing import List, Optional
+import sys
+import argparse
+import numpy as np
+
+ITERS = 1000
+FLIPS = 100
+SEED = 123456
+# Chunks hold about this many flips, so memory does not grow with the number of flips per series.
+CELL_BUDGET = 1 << 22
+
+
+def get_max_runs(flips: np.ndarray) -> np.ndarray:
+    """Vectorized get_max_run: returns the longest run of ones in each row of a 0/1 matrix.
+    For every position finds the last zero before it, so the current run is the distance to it."""
+    positions = np.arange(1, flips.shape[1] + 1, dtype=np.min_scalar_type(flips.shape[1]))
+    last_zero = np.maximum.accumulate(np.where(flips == 0, positions, 0), axis=1)
+    return (positions - last_zero).max(axis=1, initial=0)
+
+
+def get_chunk_rows(flips: int, cell_budget: int = CELL_BUDGET) -> int:
+    """Returns the number of series of flips coin flips which fit into cell_budget flips,
+    at least one."""
+    return max(1, cell_budget // max(flips, 1))
+
+
+def sum_max_runs(iters: int, flips: int, rng: np.random.Generator,
+                 chunk_rows: Optional[int] = None) -> int:
+    """Simulates iters series of flips coin flips and returns the sum of their longest runs.
+    Series are generated by chunks of chunk_rows rows (get_chunk_rows by default)
+    to keep memory bounded."""
+    if chunk_rows is None:
+        chunk_rows = get_chunk_rows(flips)
+    s = 0
+    for start in range(0, iters, chunk_rows):
+        rows = min(chunk_rows, iters - start)
+        s += int(get_max_runs(rng.integers(0, 2, size=(rows, flips), dtype=np.int8)).sum())
+    return s
+
+
+def main(args_str: List[str]) -> None:
+    parser = argparse.ArgumentParser(description='Vectorized version of largest_heads_run.py.')
+    parser.add_argument('--iters', type=int, default=ITERS)
+    parser.add_argument('--flips', type=int, default=FLIPS)
+    parser.add_argument('--seed', type=int, default=SEED)
+    args = parser.parse_args(args_str)
+
+    s = sum_max_runs(args.iters, args.flips, np.random.default_rng(args.seed))
+    total = args.iters
+    print(s, total, s / total)
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
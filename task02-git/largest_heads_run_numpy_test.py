@@ -0,0 +1,54 @@
+import numpy as np
+from largest_heads_run_solution import get_max_run
+import largest_heads_run_numpy
+
+
+def test_get_max_runs() -> None:
+    flips = np.array([
+        [0, 0, 0, 0],
+        [1, 1, 1, 1],
+        [1, 1, 0, 1],
+        [0, 1, 0, 1],
+        [1, 0, 1, 1],
+    ])
+    assert largest_heads_run_numpy.get_max_runs(flips).tolist() == [0, 4, 2, 1, 2]
+
+
+def test_get_max_runs_matches_get_max_run() -> None:
+    flips = np.random.default_rng(1).integers(0, 2, size=(1000, 30))
+    expected = [get_max_run(row) for row in flips.tolist()]
+    assert largest_heads_run_numpy.get_max_runs(flips).tolist() == expected
+
+
+def test_sum_max_runs_does_not_depend_on_chunks() -> None:
+    def simulate(chunk_rows: int) -> int:
+        return largest_heads_run_numpy.sum_max_runs(
+            1000, 20, np.random.default_rng(5), chunk_rows=chunk_rows)
+    assert simulate(1000) == simulate(1000)
+    assert simulate(10) == simulate(1000)
+    assert simulate(7) == simulate(1000)
+
+
+def test_get_chunk_rows() -> None:
+    assert largest_heads_run_numpy.get_chunk_rows(100, cell_budget=1000) == 10
+    assert largest_heads_run_numpy.get_chunk_rows(3000, cell_budget=1000) == 1
+    assert largest_heads_run_numpy.get_chunk_rows(0, cell_budget=1000) == 1000
+    rows = largest_heads_run_numpy.get_chunk_rows(10 ** 6)
+    assert rows * 10 ** 6 <= largest_heads_run_numpy.CELL_BUDGET
+
+
+def test_sum_max_runs_mean() -> None:
+    s = largest_heads_run_numpy.sum_max_runs(100000, 100, np.random.default_rng(2))
+    assert 5.9 < s / 100000 < 6.1
+
+
+def test_main(capsys) -> None:
+    largest_heads_run_numpy.main(['--iters', '10', '--flips', '1'])
+    largest_heads_run_numpy.main(['--iters', '10', '--flips', '1'])
+    out, err = capsys.readouterr()
+    assert err == ''
+    first, second = out.split('\n')[:2]
+    assert first == second
+    s, total, mean = first.split()
+    assert total == '10'
+    assert float(mean) == int(s) / 10
@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+from typing import Iterator, List, Optional, Tuple
+import os
+import sys
+import random
+import argparse
+import multiprocessing
+import numpy as np
+from largest_heads_run_solution import get_max_run
+import largest_heads_run_numpy
+
+ITERS = 1000
+FLIPS = 100
+SEED = 123456
+
+Chunk = Tuple[str, int, int, np.random.SeedSequence]
+
+
+def sum_max_runs_python(iters: int, flips: int, rng: random.Random) -> int:
+    """Same as largest_heads_run_numpy.sum_max_runs, but uses get_max_run."""
+    return sum(get_max_run([rng.choice([0, 1]) for _ in range(flips)]) for _ in range(iters))
+
+
+def run_chunk(chunk: Chunk) -> int:
+    """Returns the sum of longest runs in a chunk of series, the chunk is
+    (engine, rows, flips, seed sequence of the chunk)."""
+    engine, rows, flips, seed_sequence = chunk
+    if engine == 'python':
+        rng = random.Random(int(seed_sequence.generate_state(1)[0]))
+        return sum_max_runs_python(rows, flips, rng)
+    return largest_heads_run_numpy.sum_max_runs(rows, flips, np.random.default_rng(seed_sequence))
+
+
+def make_chunks(engine: str, iters: int, flips: int, seed: int,
+                chunk_rows: int) -> Iterator[Chunk]:
+    """Splits iters series into chunks of chunk_rows rows. Every chunk gets its own
+    independent random stream, the same as SeedSequence(seed).spawn() would give."""
+    for index, start in enumerate(range(0, iters, chunk_rows)):
+        seed_sequence = np.random.SeedSequence(seed, spawn_key=(index,))
+        yield engine, min(chunk_rows, iters - start), flips, seed_sequence
+
+
+def sum_max_runs_parallel(engine: str, iters: int, flips: int, seed: int, workers: int,
+                          chunk_rows: Optional[int] = None) -> int:
+    """Runs chunks in a pool of workers processes and sums their results.
+    Chunks are generated lazily, so memory does not depend on iters.
+    By default chunks are sized by largest_heads_run_numpy.get_chunk_rows,
+    so their memory does not depend on flips either.
+    The result depends on seed and chunk_rows, but not on workers."""
+    if chunk_rows is None:
+        chunk_rows = largest_heads_run_numpy.get_chunk_rows(flips)
+    chunks = make_chunks(engine, iters, flips, seed, chunk_rows)
+    if workers == 1:
+        return sum(map(run_chunk, chunks))
+    with multiprocessing.Pool(workers) as pool:
+        return sum(pool.imap_unordered(run_chunk, chunks))
+
+
+def main(args_str: List[str]) -> None:
+    parser = argparse.ArgumentParser(description='Parallel version of largest_heads_run.py.')
+    parser.add_argument('--iters', type=int, default=ITERS)
+    parser.add_argument('--flips', type=int, default=FLIPS)
+    parser.add_argument('--seed', type=int, default=SEED)
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+    parser.add_argument('--chunk-rows', type=int,
+                        help='series per chunk, by default about '
+                             f'{largest_heads_run_numpy.CELL_BUDGET} flips per chunk')
+    parser.add_argument('--engine', choices=['numpy', 'python'], default='numpy')
+    args = parser.parse_args(args_str)
+    if args.workers < 1 or (args.chunk_rows is not None and args.chunk_rows < 1):
+        parser.error('number of workers and chunk size should be positive')
+
+    s = sum_max_runs_parallel(args.engine, args.iters, args.flips, args.seed, args.workers,
+                              args.chunk_rows)
+    total = args.iters
+    print(s, total, s / total)
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
@@ -0,0 +1,42 @@
+import random
+import numpy as np
+import largest_heads_run_parallel
+
+
+def test_sum_max_runs_python() -> None:
+    s = largest_heads_run_parallel.sum_max_runs_python(1000, 3, random.Random(1))
+    # E[longest run of 3 flips] = (0 * 1 + 1 * 4 + 2 * 2 + 3 * 1) / 8
+    assert abs(s / 1000 - 11 / 8) < 0.1
+    assert s == largest_heads_run_parallel.sum_max_runs_python(1000, 3, random.Random(1))
+
+
+def test_make_chunks() -> None:
+    chunks = list(largest_heads_run_parallel.make_chunks('numpy', 10, 5, 42, 4))
+    assert [chunk[:3] for chunk in chunks] == [('numpy', 4, 5), ('numpy', 4, 5), ('numpy', 2, 5)]
+    spawned = np.random.SeedSequence(42).spawn(3)
+    assert [chunk[3].generate_state(4).tolist() for chunk in chunks] == [
+        seed_sequence.generate_state(4).tolist() for seed_sequence in spawned]
+
+
+def test_run_chunk() -> None:
+    seed_sequence = np.random.SeedSequence(1)
+    for engine in ('numpy', 'python'):
+        s = largest_heads_run_parallel.run_chunk((engine, 1000, 3, seed_sequence))
+        assert s == largest_heads_run_parallel.run_chunk((engine, 1000, 3, seed_sequence))
+        assert abs(s / 1000 - 11 / 8) < 0.1
+
+
+def test_sum_max_runs_parallel_does_not_depend_on_workers() -> None:
+    for engine in ('numpy', 'python'):
+        results = [largest_heads_run_parallel.sum_max_runs_parallel(
+            engine, 1000, 10, 7, workers, chunk_rows=100) for workers in (1, 1, 3)]
+        assert results[0] == results[1] == results[2]
+
+
+def test_main(capsys) -> None:
+    largest_heads_run_parallel.main(['--iters', '10', '--flips', '1', '--workers', '2'])
+    out, err = capsys.readouterr()
+    assert err == ''
+    s, total, mean = out.split()
+    assert total == '10'
+    assert float(mean) == int(s) / 10
@@ -1,17 +1,20 @@
-import threading
-import time
+import functools
+from typing import Callable, Optional
 from bot import UserHandler
+from scheduler import Scheduler, default_scheduler
 
 
 class AlarmUserHandler(UserHandler):
+    def __init__(self, send_message: Callable[[str], None],
+                 scheduler: Optional[Scheduler] = None) -> None:
+        """scheduler -- планировщик будильников, по умолчанию общий для всех обработчиков."""
+        super(AlarmUserHandler, self).__init__(send_message)
+        self.scheduler = scheduler if scheduler is not None else default_scheduler()
+
     def handle_message(self, message: str) -> None:
         try:
             alarm_after = int(message)
         except ValueError:
             self.send_message('Please send number of seconds: pause before new alarm')
             return
-
-        def alarm() -> None:
-            time.sleep(alarm_after)  # Untestable! Inject `time.sleep`.
-            self.send_message('Alarm!')
-        threading.Thread(target=alarm).start()
+        self.scheduler.call_later(alarm_after, functools.partial(self.send_message, 'Alarm!'))
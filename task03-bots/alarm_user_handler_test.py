@@ -0,0 +1,26 @@
+import pytest_mock
+from alarm_user_handler import AlarmUserHandler
+from scheduler import Scheduler
+from scheduler_test import FakeClock
+
+
+def test_alarm(mocker: pytest_mock.MockFixture) -> None:
+    send_message = mocker.stub(name='send_message_stub')
+    clock = FakeClock()
+    handler = AlarmUserHandler(send_message, Scheduler(clock, threaded=False))
+    handler.handle_message('hello')
+    handler.handle_message('2')
+    handler.handle_message('1')
+    assert send_message.call_args_list == [
+        mocker.call('Please send number of seconds: pause before new alarm'),
+    ]
+    clock.now = 1
+    handler.scheduler.run_pending()
+    clock.now = 2
+    handler.scheduler.run_pending()
+    assert send_message.call_args_list == [
+        mocker.call('Please send number of seconds: pause before new alarm'),
+        mocker.call('Alarm!'),
+        mocker.call('Alarm!'),
+    ]
+    assert handler.scheduler.next_delay() is None
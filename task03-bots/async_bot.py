@@ -0,0 +1,104 @@
+import asyncio
+import threading
+from abc import ABC, abstractmethod
+from typing import Awaitable, Callable, Dict, List, Set, Type
+from bot import UserHandler
+
+AsyncSend = Callable[[str], Awaitable[None]]
+
+
+class AsyncBot(ABC):
+    """Асинхронный аналог Bot: handle_message является корутиной,
+    а send_message возвращает awaitable.
+    Все боты работают в одном цикле событий asyncio, без потока на пользователя."""
+    def __init__(self, send_message: Callable[[int, str], Awaitable[None]]) -> None:
+        """Конструктор бота.
+        send_message --- асинхронная функция, которую бот должен вызвать (и дождаться)
+            для отправки сообщения. Она принимает номер пользователя-получателя и текст."""
+        self.send_message = send_message
+
+    @abstractmethod
+    async def handle_message(self, from_user_id: int, message: str) -> None:
+        """Корутина, которая вызывается у бота, чтобы отправить ему сообщение.
+        from_user_id -- номер пользователя, отправившего сообщение.
+        message -- текст сообщения.
+        """
+
+
+class AsyncUserHandler(ABC):
+    """Асинхронный аналог UserHandler."""
+    def __init__(self, send_message: AsyncSend) -> None:
+        """Конструктор обработчика.
+        send_message -- асинхронная функция, которую обработчик должен вызвать (и дождаться)
+            для отправки сообщения пользователю. Она принимает ровно один параметр: текст."""
+        self.send_message = send_message
+
+    @abstractmethod
+    async def handle_message(self, message: str) -> None:
+        """Корутина, которую бот вызывает у обработчика, чтобы передать ему сообщение
+        от пользователя."""
+
+
+class AsyncUserIndependentBot(AsyncBot):
+    """Асинхронный аналог UserIndependentBot.
+    user_handler -- функция, создающая обработчик по его send_message:
+        класс-наследник AsyncUserHandler или результат adapt_user_handler."""
+    def __init__(self, send_message: Callable[[int, str], Awaitable[None]],
+                 user_handler: Callable[[AsyncSend], AsyncUserHandler]) -> None:
+        super(AsyncUserIndependentBot, self).__init__(send_message)
+        self.user_handler = user_handler
+        self.users: Dict[int, AsyncUserHandler] = {}
+
+    async def handle_message(self, from_user_id: int, message: str) -> None:
+        if from_user_id not in self.users:
+            self.users[from_user_id] = self.user_handler(
+                lambda out_msg: self.send_message(from_user_id, out_msg)
+            )
+        await self.users[from_user_id].handle_message(message)
+
+
+class SyncUserHandlerAdapter(AsyncUserHandler):
+    """Обработчик, запускающий синхронный UserHandler внутри цикла событий.
+    Сообщения, которые синхронный обработчик отправляет во время handle_message,
+    отправляются и дожидаются по порядку до завершения handle_message.
+    Сообщения из других потоков (например, от AlarmUserHandler) передаются
+    в цикл событий потокобезопасно и отправляются в отдельных задачах.
+    Адаптер должен создаваться внутри работающего цикла событий."""
+    def __init__(self, send_message: AsyncSend, handler_class: Type[UserHandler]) -> None:
+        super(SyncUserHandlerAdapter, self).__init__(send_message)
+        self.loop = asyncio.get_running_loop()
+        self.loop_thread = threading.get_ident()
+        self.handling = False
+        self.pending: List[str] = []
+        self.tasks: Set['asyncio.Future[None]'] = set()
+        self.handler = handler_class(self.send_from_handler)
+
+    def send_from_handler(self, message: str) -> None:
+        """Функция send_message, переданная синхронному обработчику."""
+        if self.handling and threading.get_ident() == self.loop_thread:
+            self.pending.append(message)
+        else:
+            self.loop.call_soon_threadsafe(self.start_sending, message)
+
+    def start_sending(self, message: str) -> None:
+        task = asyncio.ensure_future(self.send_message(message))
+        # Цикл событий хранит только слабые ссылки на задачи.
+        self.tasks.add(task)
+        task.add_done_callback(self.tasks.discard)
+
+    async def handle_message(self, message: str) -> None:
+        self.handling = True
+        try:
+            self.handler.handle_message(message)
+        finally:
+            self.handling = False
+        pending, self.pending = self.pending, []
+        for out_msg in pending:
+            await self.send_message(out_msg)
+
+
+def adapt_user_handler(
+        handler_class: Type[UserHandler]) -> Callable[[AsyncSend], AsyncUserHandler]:
+    """Возвращает функцию для AsyncUserIndependentBot, создающую обработчики
+    класса handler_class, обёрнутые в SyncUserHandlerAdapter."""
+    return lambda send_message: SyncUserHandlerAdapter(send_message, handler_class)
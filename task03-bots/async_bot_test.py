@@ -0,0 +1,59 @@
+import asyncio
+from typing import List, Tuple
+from alarm_user_handler import AlarmUserHandler
+from async_bot import AsyncUserHandler, AsyncUserIndependentBot, adapt_user_handler
+from bot import UserHandler
+
+
+class EchoUserHandler(UserHandler):
+    def handle_message(self, message: str) -> None:
+        self.send_message(message)
+        self.send_message(message.upper())
+
+
+class AsyncCountingUserHandler(AsyncUserHandler):
+    def __init__(self, send_message) -> None:
+        super().__init__(send_message)
+        self.count = 0
+
+    async def handle_message(self, message: str) -> None:
+        self.count += 1
+        await asyncio.sleep(0)
+        await self.send_message(f'{self.count}: {message}')
+
+
+def run_bot(user_handler, messages: List[Tuple[int, str]],
+            expected_sent: int) -> List[Tuple[int, str]]:
+    sent: List[Tuple[int, str]] = []
+
+    async def send_message(user_id: int, message: str) -> None:
+        await asyncio.sleep(0)
+        sent.append((user_id, message))
+
+    async def run() -> None:
+        bot = AsyncUserIndependentBot(send_message, user_handler)
+        for user_id, message in messages:
+            await bot.handle_message(user_id, message)
+        for _ in range(1000):
+            if len(sent) >= expected_sent:
+                break
+            await asyncio.sleep(0.01)
+
+    asyncio.run(run())
+    return sent
+
+
+def test_async_user_independent_bot() -> None:
+    sent = run_bot(AsyncCountingUserHandler, [(1, 'a'), (2, 'b'), (1, 'c')], 3)
+    assert sent == [(1, '1: a'), (2, '1: b'), (1, '2: c')]
+
+
+def test_sync_handler_adapter_keeps_order() -> None:
+    sent = run_bot(adapt_user_handler(EchoUserHandler), [(1, 'a'), (2, 'b')], 4)
+    assert sent == [(1, 'a'), (1, 'A'), (2, 'b'), (2, 'B')]
+
+
+def test_sync_handler_adapter_sends_from_threads() -> None:
+    sent = run_bot(adapt_user_handler(AlarmUserHandler), [(1, 'x'), (2, '0'), (1, '0')], 3)
+    assert sent[0] == (1, 'Please send number of seconds: pause before new alarm')
+    assert sorted(sent[1:]) == [(1, 'Alarm!'), (2, 'Alarm!')]
@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+import sys
+import json
+import time
+import random
+import argparse
+import itertools
+import tracemalloc
+from typing import Any, Callable, Dict, List, Tuple
+from alarm_user_handler import AlarmUserHandler
+from bot import Bot, UserIndependentBot
+from chat_bot import ChatBot
+from scheduler import Scheduler
+from tictactoe_ai_user_handler import TicTacToeAiUserHandler
+from tictactoe_user_handler import TicTacToeUserHandler
+
+# Будильники не должны срабатывать во время замера, поэтому планировщик без потока.
+BENCH_SCHEDULER = Scheduler(threaded=False)
+
+
+class BenchAlarmUserHandler(AlarmUserHandler):
+    def __init__(self, send_message: Callable[[str], None]) -> None:
+        super(BenchAlarmUserHandler, self).__init__(send_message, BENCH_SCHEDULER)
+
+
+def make_bot(scenario: str, send_message: Callable[[int, str], None]) -> Bot:
+    if scenario == 'chat':
+        return ChatBot(send_message)
+    if scenario == 'alarm':
+        return UserIndependentBot(send_message, BenchAlarmUserHandler)
+    if scenario == 'tictactoe':
+        return UserIndependentBot(send_message, TicTacToeUserHandler)
+    assert scenario == 'tictactoe-ai'
+    return UserIndependentBot(send_message, TicTacToeAiUserHandler)
+
+
+def random_message(scenario: str, rng: random.Random) -> str:
+    """Случайное сообщение сценария, среди них бывают и некорректные."""
+    if scenario == 'chat':
+        return 'hello, world'
+    if scenario == 'alarm':
+        return str(rng.randrange(3600)) if rng.random() < 0.9 else 'soon'
+    if rng.random() < 0.1:
+        return 'start'
+    return f'{rng.choice("XO")} {rng.randrange(3)} {rng.randrange(3)}'
+
+
+def make_load(users: int, messages: int, skew: float, scenario: str,
+              rng: random.Random) -> List[Tuple[int, str]]:
+    """Возвращает список пар (пользователь, сообщение). Номер пользователя выбирается
+    по закону Ципфа с параметром skew: пользователь ранга k пишет пропорционально 1 / k^skew,
+    при skew = 0 все пользователи пишут одинаково часто."""
+    cum_weights = list(itertools.accumulate(1 / rank ** skew for rank in range(1, users + 1)))
+    user_ids = rng.choices(range(users), cum_weights=cum_weights, k=messages)
+    return [(user_id, random_message(scenario, rng)) for user_id in user_ids]
+
+
+def percentile(sorted_values: List[int], q: float) -> int:
+    return sorted_values[min(len(sorted_values) - 1, int(q * len(sorted_values)))]
+
+
+def run_load(scenario: str, load: List[Tuple[int, str]], rate: float) -> Dict[str, Any]:
+    """Отправляет сообщения боту и измеряет пропускную способность и задержки.
+    Если rate > 0, сообщения отправляются не чаще rate в секунду."""
+    sent = [0]
+
+    def send_message(to_user_id: int, message: str) -> None:  # pylint: disable=W0613
+        sent[0] += 1
+    bot = make_bot(scenario, send_message)
+    latencies = []
+    start = time.perf_counter()
+    for i, (user_id, message) in enumerate(load):
+        if rate > 0:
+            delay = start + i / rate - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+        before = time.perf_counter_ns()
+        bot.handle_message(user_id, message)
+        latencies.append(time.perf_counter_ns() - before)
+    seconds = time.perf_counter() - start
+    latencies.sort()
+    return {
+        'seconds': seconds,
+        'messages_per_s': len(load) / seconds,
+        'sent_messages': sent[0],
+        'latency_p50_us': percentile(latencies, 0.5) / 1000,
+        'latency_p99_us': percentile(latencies, 0.99) / 1000,
+        'latency_max_us': latencies[-1] / 1000,
+    }
+
+
+def measure_memory(scenario: str, load: List[Tuple[int, str]]) -> float:
+    """Возвращает память бота в байтах в расчёте на одного пользователя. Измеряется
+    отдельным прогоном, потому что tracemalloc сильно замедляет выполнение."""
+    tracemalloc.start()
+    try:
+        before = tracemalloc.get_traced_memory()[0]
+        bot = make_bot(scenario, lambda to_user_id, message: None)
+        for user_id, message in load:
+            bot.handle_message(user_id, message)
+        used = tracemalloc.get_traced_memory()[0] - before
+    finally:
+        tracemalloc.stop()
+    return used / len({user_id for user_id, _ in load})
+
+
+def main(args_str: List[str]) -> None:
+    parser = argparse.ArgumentParser(description='Load generator and benchmark for bots.')
+    parser.add_argument('--scenario', choices=['chat', 'alarm', 'tictactoe', 'tictactoe-ai'],
+                        nargs='+', default=['alarm', 'tictactoe', 'tictactoe-ai'],
+                        help='chat sends every message to all users, use it with few users')
+    parser.add_argument('--users', type=int, default=10000)
+    parser.add_argument('--messages', type=int, default=100000)
+    parser.add_argument('--skew', type=float, default=1.0,
+                        help='Zipf exponent of user activity, 0 for uniform')
+    parser.add_argument('--rate', type=float, default=0,
+                        help='messages per second, 0 for as fast as possible')
+    parser.add_argument('--no-memory', action='store_true', help='skip the tracemalloc run')
+    parser.add_argument('--seed', type=int, default=123456)
+    parser.add_argument('--json', help='write results to this file')
+    args = parser.parse_args(args_str)
+
+    results = []
+    for scenario in args.scenario:
+        load = make_load(args.users, args.messages, args.skew, scenario,
+                         random.Random(args.seed))
+        result: Dict[str, Any] = {
+            'scenario': scenario,
+            'users': args.users,
+            'messages': args.messages,
+            'skew': args.skew,
+            'rate': args.rate,
+            'seed': args.seed,
+            'users_seen': len({user_id for user_id, _ in load}),
+        }
+        result.update(run_load(scenario, load, args.rate))
+        if not args.no_memory:
+            result['memory_per_user_bytes'] = measure_memory(scenario, load)
+        results.append(result)
+        print(f'{scenario:>12} {result["messages_per_s"]:>10.0f} msg/s '
+              f'p50={result["latency_p50_us"]:.1f} us p99={result["latency_p99_us"]:.1f} us '
+              f'{result.get("memory_per_user_bytes", 0):>8.0f} B/user')
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as out_file:
+            json.dump({'python': sys.version, 'results': results}, out_file, indent=2)
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
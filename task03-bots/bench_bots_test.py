@@ -0,0 +1,28 @@
+import json
+import random
+import bench_bots
+
+
+def test_make_load_is_seeded_and_skewed() -> None:
+    load = bench_bots.make_load(100, 5000, 1.5, 'tictactoe', random.Random(1))
+    assert load == bench_bots.make_load(100, 5000, 1.5, 'tictactoe', random.Random(1))
+    counts = [0] * 100
+    for user_id, _ in load:
+        counts[user_id] += 1
+    assert counts[0] > counts[1] > counts[10]
+    uniform = bench_bots.make_load(100, 5000, 0, 'chat', random.Random(1))
+    assert {user_id for user_id, _ in uniform} == set(range(100))
+
+
+def test_integrate_main(tmp_path, capsys) -> None:
+    path = tmp_path / 'report.json'
+    bench_bots.main(['--scenario', 'chat', 'alarm', 'tictactoe', 'tictactoe-ai',
+                     '--users', '20', '--messages', '300', '--json', str(path)])
+    assert len(capsys.readouterr().out.splitlines()) == 4
+    results = json.loads(path.read_text())['results']
+    assert [result['scenario'] for result in results] == ['chat', 'alarm', 'tictactoe',
+                                                          'tictactoe-ai']
+    for result in results:
+        assert result['latency_p50_us'] <= result['latency_p99_us'] <= result['latency_max_us']
+        assert result['memory_per_user_bytes'] > 0
+    assert results[0]['sent_messages'] > 300
@@ -0,0 +1,43 @@
+#!/usr/bin/env python3
+import sys
+import time
+import random
+import argparse
+from typing import List
+from gomoku import Gomoku
+
+
+def time_per_move(size: int, win_length: int, games: int, rng: random.Random) -> float:
+    """Играет games случайных партий и возвращает среднее время make_turn в секундах."""
+    total = 0.0
+    moves = 0
+    for _ in range(games):
+        game = Gomoku(size, win_length)
+        cells = [divmod(cell, size) for cell in range(size * size)]
+        rng.shuffle(cells)
+        for row, col in cells:
+            player = game.current_player()
+            if game.is_finished() or player is None:
+                break
+            start = time.perf_counter()
+            game.make_turn(player, row=row, col=col)
+            total += time.perf_counter() - start
+            moves += 1
+    return total / moves
+
+
+def main(args_str: List[str]) -> None:
+    parser = argparse.ArgumentParser(description='Benchmark of Gomoku.make_turn on growing boards.')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[5, 15, 50, 150, 500])
+    parser.add_argument('--win-length', type=int, default=5)
+    parser.add_argument('--games', type=int, default=20)
+    parser.add_argument('--seed', type=int, default=123456)
+    args = parser.parse_args(args_str)
+    rng = random.Random(args.seed)
+    print(f'{"size":>6} {"us/move":>10}')
+    for size in args.sizes:
+        print(f'{size:>6} {time_per_move(size, args.win_length, args.games, rng) * 1e6:>10.2f}')
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
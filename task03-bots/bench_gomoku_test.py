@@ -0,0 +1,14 @@
+import random
+import bench_gomoku
+
+
+def test_time_per_move() -> None:
+    assert bench_gomoku.time_per_move(3, 3, 2, random.Random(1)) > 0
+
+
+def test_integrate_main(capsys) -> None:
+    bench_gomoku.main(['--sizes', '3', '7', '--win-length', '3', '--games', '1'])
+    lines = capsys.readouterr().out.splitlines()
+    assert lines[0].split() == ['size', 'us/move']
+    assert [line.split()[0] for line in lines[1:]] == ['3', '7']
+    assert all(float(line.split()[1]) > 0 for line in lines[1:])
@@ -1,19 +1,32 @@
+import time
 from abc import ABC, abstractmethod
-from typing import Callable, Dict, Type, TypeVar
+from collections import OrderedDict
+from typing import Callable, Collection, Dict, MutableMapping, Optional, Type, TypeVar
 
 
 class Bot(ABC):
     """Абстрактный класс бота.
     Требуется переопределить метод handle_message.
-    Внутри бота доступен метод self.send_message.
+    Внутри бота доступны методы self.send_message и self.send_many.
     """
-    def __init__(self, send_message: Callable[[int, str], None]) -> None:
+    def __init__(self, send_message: Callable[[int, str], None],
+                 send_many: Optional[Callable[[Collection[int], str], None]] = None) -> None:
         """Конструктор бота.
         send_message --- функция, которую бот должен вызвать для отправки сообщения.
             Она принимает два параметра: номер пользователя-получателя сообщения и
             текст сообщения.
+        send_many --- функция для отправки одного и того же сообщения нескольким
+            пользователям за один вызов. Она принимает коллекцию номеров получателей
+            (действительную только во время вызова) и текст сообщения.
+            Если не передана, сообщение отправляется каждому получателю через send_message.
              """
         self.send_message = send_message
+        self.send_many = send_many or self.send_to_each
+
+    def send_to_each(self, user_ids: Collection[int], message: str) -> None:
+        """Реализация send_many по умолчанию: отдельный вызов send_message на каждого."""
+        for user_id in user_ids:
+            self.send_message(user_id, message)
 
     @abstractmethod
     def handle_message(self, from_user_id: int, message: str) -> None:
@@ -33,18 +46,80 @@ class UserIndependentBot(Bot):
         Она будет передана в конструктор класса Bot.
     user_handler -- класс, реализующий интерфейс UserHandler.
         Для каждого пользователя будет создан независимый экземпляр этого класса.
+    max_handlers -- если указано, хранится не больше max_handlers обработчиков (хотя бы один):
+        при превышении вытесняется обработчик, дольше всех не получавший сообщений.
+    idle_timeout -- если указано, обработчики пользователей, не писавших дольше
+        idle_timeout секунд (по часам clock), вытесняются.
+    state_store -- если указано, состояние вытесненного обработчика (UserHandler.dump_state)
+        сохраняется сюда и восстанавливается при следующем сообщении пользователя.
+    Счётчики hits, misses и evictions считают сообщения пользователям с уже созданным
+    обработчиком, сообщения, потребовавшие создать обработчик, и вытеснения.
     """
-    def __init__(self, send_message: Callable[[int, str], None], user_handler: Type[T]) -> None:
+    def __init__(self, send_message: Callable[[int, str], None], user_handler: Type[T], *,
+                 max_handlers: Optional[int] = None,
+                 idle_timeout: Optional[float] = None,
+                 clock: Callable[[], float] = time.monotonic,
+                 state_store: Optional[MutableMapping[int, bytes]] = None) -> None:
         super(UserIndependentBot, self).__init__(send_message)
+        if max_handlers is not None and max_handlers < 1:
+            raise ValueError(f'max_handlers must be positive, got {max_handlers}')
         self.user_handler = user_handler
-        self.users: Dict[int, T] = {}
+        # Порядок пользователей -- от давно писавших к недавно писавшим.
+        self.users: 'OrderedDict[int, UserHandler]' = OrderedDict()
+        self.last_seen: Dict[int, float] = {}
+        self.max_handlers = max_handlers
+        self.idle_timeout = idle_timeout
+        self.clock = clock
+        self.state_store = state_store
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
 
     def handle_message(self, from_user_id: int, message: str) -> None:
-        if from_user_id not in self.users:
-            self.users[from_user_id] = self.user_handler(
-                lambda out_msg: self.send_message(from_user_id, out_msg)
-            )
-        self.users[from_user_id].handle_message(message)
+        handler = self.users.get(from_user_id)
+        if handler is None:
+            self.misses += 1
+            handler = self.create_handler(from_user_id)
+            self.users[from_user_id] = handler
+        else:
+            self.hits += 1
+            self.users.move_to_end(from_user_id)
+        if self.idle_timeout is not None:
+            self.last_seen[from_user_id] = self.clock()
+        try:
+            handler.handle_message(message)
+        finally:
+            # Вытесняем после обработки: текущий обработчик только что стал самым свежим.
+            self.evict()
+
+    def create_handler(self, user_id: int) -> 'UserHandler':
+        """Создаёт обработчик пользователя и восстанавливает его сохранённое состояние."""
+        handler = self.user_handler(lambda out_msg: self.send_message(user_id, out_msg))
+        if self.state_store is not None:
+            state = self.state_store.pop(user_id, None)
+            if state is not None:
+                handler.load_state(state)
+        return handler
+
+    def evict(self) -> None:
+        """Вытесняет лишние и простаивающие обработчики. Можно вызывать периодически,
+        чтобы освобождать память, даже если сообщений нет."""
+        if self.max_handlers is not None:
+            while len(self.users) > self.max_handlers:
+                self.evict_oldest()
+        if self.idle_timeout is not None:
+            deadline = self.clock() - self.idle_timeout
+            while self.users and self.last_seen[next(iter(self.users))] < deadline:
+                self.evict_oldest()
+
+    def evict_oldest(self) -> None:
+        user_id, handler = self.users.popitem(last=False)
+        self.last_seen.pop(user_id, None)
+        self.evictions += 1
+        if self.state_store is not None:
+            state = handler.dump_state()
+            if state is not None:
+                self.state_store[user_id] = state
 
 
 class UserHandler(ABC):
@@ -62,3 +137,12 @@ class UserHandler(ABC):
     def handle_message(self, message: str) -> None:
         """Метод, который бот вызывает у обработчка, чтобы передать ему сообщение
         от пользователя."""
+
+    def dump_state(self) -> Optional[bytes]:
+        """Возвращает сериализованное состояние обработчика или None, если сохранять нечего.
+        Состояние можно восстановить в новом обработчике методом load_state."""
+        return None
+
+    def load_state(self, state: bytes) -> None:
+        """Восстанавливает состояние, полученное от dump_state. Вызывается сразу после
+        создания обработчика и только если dump_state ранее вернул не None."""
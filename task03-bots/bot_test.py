@@ -0,0 +1,93 @@
+from typing import Callable, Dict, List, Optional, Tuple
+import pytest
+from bot import UserHandler, UserIndependentBot
+from scheduler_test import FakeClock
+from tictactoe_user_handler import TicTacToeUserHandler
+
+
+class CountingUserHandler(UserHandler):
+    def __init__(self, send_message: Callable[[str], None]) -> None:
+        super(CountingUserHandler, self).__init__(send_message)
+        self.count = 0
+
+    def handle_message(self, message: str) -> None:
+        self.count += 1
+        self.send_message(f'{self.count}: {message}')
+
+    def dump_state(self) -> Optional[bytes]:
+        return str(self.count).encode()
+
+    def load_state(self, state: bytes) -> None:
+        self.count = int(state)
+
+
+def make_bot(**kwargs) -> Tuple[UserIndependentBot, List[Tuple[int, str]]]:
+    sent: List[Tuple[int, str]] = []
+    bot = UserIndependentBot(lambda user_id, message: sent.append((user_id, message)),
+                             CountingUserHandler, **kwargs)
+    return bot, sent
+
+
+def test_user_independent_bot() -> None:
+    bot, sent = make_bot()
+    bot.handle_message(1, 'a')
+    bot.handle_message(2, 'b')
+    bot.handle_message(1, 'c')
+    assert sent == [(1, '1: a'), (2, '1: b'), (1, '2: c')]
+    assert (bot.hits, bot.misses, bot.evictions) == (1, 2, 0)
+
+
+def test_max_handlers_evicts_least_recently_used() -> None:
+    bot, sent = make_bot(max_handlers=2)
+    for user_id in [1, 2, 1, 3, 1, 2]:
+        bot.handle_message(user_id, 'x')
+    assert sent == [(1, '1: x'), (2, '1: x'), (1, '2: x'), (3, '1: x'), (1, '3: x'), (2, '1: x')]
+    assert list(bot.users) == [1, 2]
+    assert (bot.hits, bot.misses, bot.evictions) == (2, 4, 2)
+
+
+def test_idle_timeout() -> None:
+    clock = FakeClock()
+    bot, sent = make_bot(idle_timeout=10, clock=clock)
+    bot.handle_message(1, 'x')
+    clock.now = 5
+    bot.handle_message(2, 'x')
+    clock.now = 12
+    bot.evict()
+    assert list(bot.users) == [2]
+    bot.handle_message(1, 'x')
+    clock.now = 16
+    bot.handle_message(1, 'x')
+    assert list(bot.users) == [1]
+    assert sent == [(1, '1: x'), (2, '1: x'), (1, '1: x'), (1, '2: x')]
+    assert bot.evictions == 2
+
+
+def test_state_store_restores_evicted_handlers() -> None:
+    store: Dict[int, bytes] = {}
+    bot, sent = make_bot(max_handlers=1, state_store=store)
+    bot.handle_message(1, 'a')
+    bot.handle_message(2, 'b')
+    assert store == {1: b'1'}
+    bot.handle_message(1, 'c')
+    assert store == {2: b'1'}
+    bot.handle_message(1, 'd')
+    assert sent == [(1, '1: a'), (2, '1: b'), (1, '2: c'), (1, '3: d')]
+
+
+def test_max_handlers_must_be_positive() -> None:
+    with pytest.raises(ValueError):
+        make_bot(max_handlers=0)
+
+
+def test_state_store_keeps_current_game() -> None:
+    store: Dict[int, bytes] = {}
+    sent: List[Tuple[int, str]] = []
+    bot = UserIndependentBot(lambda user_id, message: sent.append((user_id, message)),
+                             TicTacToeUserHandler, max_handlers=1, state_store=store)
+    bot.handle_message(1, 'start')
+    bot.handle_message(1, 'X 0 0')
+    bot.handle_message(2, 'start')
+    bot.handle_message(1, 'O 1 1')
+    assert [message for user_id, message in sent if user_id == 1] == [
+        '...\n...\n...', 'X..\n...\n...', 'X..\n.O.\n...']
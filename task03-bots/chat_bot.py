@@ -1,14 +1,16 @@
-from typing import Callable, List
+from typing import Callable, Collection, Dict, Optional
 from bot import Bot
 
 
 class ChatBot(Bot):
-    def __init__(self, send_message: Callable[[int, str], None]) -> None:
-        super(ChatBot, self).__init__(send_message)
-        self.users: List[int] = []
+    def __init__(self, send_message: Callable[[int, str], None],
+                 send_many: Optional[Callable[[Collection[int], str], None]] = None) -> None:
+        super(ChatBot, self).__init__(send_message, send_many)
+        # Словарь используется как упорядоченное множество: проверка за O(1),
+        # пользователи перечисляются в порядке появления.
+        self.users: Dict[int, None] = {}
 
     def handle_message(self, from_user_id: int, message: str) -> None:
         if from_user_id not in self.users:
-            self.users.append(from_user_id)
-        for user_id in self.users:
-            self.send_message(user_id, f'#{from_user_id}: {message}')
+            self.users[from_user_id] = None
+        self.send_many(self.users.keys(), f'#{from_user_id}: {message}')
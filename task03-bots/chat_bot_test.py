@@ -12,3 +12,19 @@ def test_chat_broadcast(mocker: pytest_mock.MockFixture) -> None:
         mocker.call(10, '#11: world'),
         mocker.call(11, '#11: world'),
     ]
+
+
+def test_chat_broadcast_send_many(mocker: pytest_mock.MockFixture) -> None:
+    send_message = mocker.stub(name='send_message_stub')
+    calls = []
+    bot = ChatBot(send_message,
+                  send_many=lambda user_ids, message: calls.append((list(user_ids), message)))
+    bot.handle_message(10, 'hello')
+    bot.handle_message(11, 'world')
+    bot.handle_message(10, 'again')
+    assert calls == [
+        ([10], '#10: hello'),
+        ([10, 11], '#11: world'),
+        ([10, 11], '#10: again'),
+    ]
+    assert send_message.call_args_list == []
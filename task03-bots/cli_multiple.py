@@ -1,8 +1,15 @@
 #!/usr/bin/env python3
 import sys
+import time
+import argparse
 import traceback
+import collections
+from typing import Callable, Counter, Iterator, List, TextIO
+from bot import Bot
 from chat_bot import ChatBot
 
+BLOCK_SIZE = 1 << 20
+
 
 def send_message(to_user_id: int, message: str) -> None:
     print(f'===== Message to {to_user_id} =====')
@@ -10,9 +17,71 @@ def send_message(to_user_id: int, message: str) -> None:
     print('==========')
 
 
+def make_bot(send_message: Callable[[int, str], None]) -> Bot:  # pylint: disable=W0621
+    """Создаёт бота для обоих режимов: чтобы сменить бота, достаточно поменять строчку
+    bot = ... здесь."""
+    bot = ChatBot(send_message=send_message)
+    return bot
+
+
+def read_batches(in_file: TextIO, block_size: int) -> Iterator[List[str]]:
+    """Читает in_file блоками по block_size символов и возвращает списки целых строк."""
+    tail = ''
+    while True:
+        block = in_file.read(block_size)
+        if not block:
+            break
+        lines = (tail + block).split('\n')
+        tail = lines.pop()
+        yield lines
+    if tail:
+        yield [tail]
+
+
+def replay_batch(in_file: TextIO, out_file: TextIO,
+                 bot_factory: Callable[[Callable[[int, str], None]], Bot],
+                 block_size: int = BLOCK_SIZE) -> None:
+    """Пакетный режим: сообщения читаются и выводятся большими блоками, а вместо
+    трассировок ошибок считается их количество по типам. В конце в sys.stderr
+    выводится статистика и скорость обработки.
+    bot_factory создаёт бота по функции отправки сообщений (см. make_bot)."""
+    output: List[str] = []
+
+    def buffered_send_message(to_user_id: int, message: str) -> None:
+        output.append(f'===== Message to {to_user_id} =====\n{message}\n==========\n')
+
+    bot = bot_factory(buffered_send_message)
+    errors: Counter[str] = collections.Counter()
+    messages = 0
+    start = time.perf_counter()
+    for lines in read_batches(in_file, block_size):
+        for line in lines:
+            messages += 1
+            try:
+                user_id, message = line.split(maxsplit=1)
+                bot.handle_message(int(user_id), message)
+            except Exception as e:  # pylint: disable=W0703
+                errors[type(e).__name__] += 1
+        out_file.write(''.join(output))
+        output.clear()
+    out_file.flush()
+    seconds = time.perf_counter() - start
+    print(f'{messages} messages in {seconds:.3f} s, {messages / max(seconds, 1e-9):.0f} messages/s',
+          file=sys.stderr)
+    for name, count in errors.most_common():
+        print(f'{name}: {count}', file=sys.stderr)
+
+
 def main() -> None:
     """Пример работы с ботом через консоль."""
-    bot = ChatBot(send_message=send_message)
+    parser = argparse.ArgumentParser(description='Chat bot reading messages from stdin.')
+    parser.add_argument('--batch', action='store_true',
+                        help='replay many messages fast: buffered I/O, errors are only counted')
+    args = parser.parse_args()
+    if args.batch:
+        replay_batch(sys.stdin, sys.stdout, make_bot)
+        return
+    bot = make_bot(send_message)
     for line in sys.stdin:
         try:
             user_id, message = line.rstrip('\n').split(maxsplit=1)
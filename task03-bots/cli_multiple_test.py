@@ -0,0 +1,24 @@
+import io
+import pytest
+from cli_multiple import make_bot, read_batches, replay_batch
+
+
+@pytest.mark.parametrize('block_size', [1, 3, 1000])
+def test_read_batches(block_size) -> None:
+    lines = [line for batch in read_batches(io.StringIO('a b\n\ncd\nef'), block_size)
+             for line in batch]
+    assert lines == ['a b', '', 'cd', 'ef']
+
+
+def test_replay_batch(capsys) -> None:
+    out_file = io.StringIO()
+    replay_batch(io.StringIO('10 hello\nbad\nx y\n11 big world\n'), out_file, make_bot,
+                 block_size=4)
+    assert out_file.getvalue() == (
+        '===== Message to 10 =====\n#10: hello\n==========\n'
+        '===== Message to 10 =====\n#11: big world\n==========\n'
+        '===== Message to 11 =====\n#11: big world\n==========\n'
+    )
+    err = capsys.readouterr().err.splitlines()
+    assert err[0].startswith('4 messages in ')
+    assert err[1:] == ['ValueError: 2']
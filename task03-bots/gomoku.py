@@ -0,0 +1,78 @@
+from typing import List, Optional
+from tictactoe import Player
+
+EMPTY = 0
+# Направления линий через клетку: горизонталь, вертикаль и две диагонали.
+DIRECTIONS = [(0, 1), (1, 0), (1, 1), (1, -1)]
+
+
+class Gomoku:
+    """Крестики-нолики на поле size x size до win_length в ряд, например, 15x15 до 5 (гомоку).
+    Интерфейс повторяет TicTacToe. Поле хранится в одном bytearray, после хода
+    проверяются только 4 линии через поставленный камень, так что ход стоит O(win_length)
+    независимо от размера поля."""
+    __slots__ = ('size', 'win_length', 'cells', 'moves', 'winner_player')
+
+    def __init__(self, size: int = 15, win_length: int = 5) -> None:
+        assert 1 <= win_length <= size
+        self.size = size
+        self.win_length = win_length
+        self.cells = bytearray(size * size)
+        self.moves = 0
+        self.winner_player: Optional[Player] = None
+
+    @property
+    def field(self) -> List[List[Optional[Player]]]:
+        """Поле в виде списка строк, только для чтения."""
+        return [[self.cell(row, col) for col in range(self.size)] for row in range(self.size)]
+
+    def cell(self, row: int, col: int) -> Optional[Player]:
+        """Возвращает игрока, занявшего клетку (row, col), или None."""
+        value = self.cells[row * self.size + col]
+        return None if value == EMPTY else Player(value)
+
+    def winner(self) -> Optional[Player]:
+        """Возвращает победителя или None, если никто не выиграл."""
+        return self.winner_player
+
+    def is_finished(self) -> bool:
+        """Возвращает True, если игра завершилась и False иначе."""
+        return self.winner_player is not None or self.moves == len(self.cells)
+
+    def current_player(self) -> Optional[Player]:
+        """Возвращает игрока, который ходит следующим. None, если все клетки заполнены."""
+        if self.moves == len(self.cells):
+            return None
+        return Player.O if self.moves & 1 else Player.X
+
+    def can_make_turn(self, player: Player, *, row: int, col: int) -> bool:
+        """Возвращает True, если игрок player может походить в клетку (row, col), False иначе."""
+        assert 0 <= row < self.size
+        assert 0 <= col < self.size
+        if self.cells[row * self.size + col] != EMPTY:
+            return False
+        if self.is_finished():
+            return False
+        return player == self.current_player()
+
+    def make_turn(self, player: Player, *, row: int, col: int) -> None:
+        """Записывает ход игрока player в клетку (row, col). Проверяет ход на корректность."""
+        assert self.can_make_turn(player, row=row, col=col)
+        self.cells[row * self.size + col] = player.value
+        self.moves += 1
+        if any(self.line_length(row, col, d_row, d_col) >= self.win_length
+               for d_row, d_col in DIRECTIONS):
+            self.winner_player = player
+
+    def line_length(self, row: int, col: int, d_row: int, d_col: int) -> int:
+        """Длина линии из камней игрока в клетке (row, col) вдоль направления (d_row, d_col)."""
+        value = self.cells[row * self.size + col]
+        length = 1
+        for sign in [1, -1]:
+            r, c = row + sign * d_row, col + sign * d_col
+            while (length < self.win_length and 0 <= r < self.size and 0 <= c < self.size
+                   and self.cells[r * self.size + c] == value):
+                length += 1
+                r += sign * d_row
+                c += sign * d_col
+        return length
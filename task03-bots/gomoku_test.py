@@ -0,0 +1,44 @@
+import random
+import pytest
+from gomoku import Gomoku
+from tictactoe import Player, TicTacToe
+
+# Ходы O, не мешающие ходам X ни в одном из случаев.
+O_CELLS = [(0, 7), (2, 7), (4, 7), (9, 2), (11, 2)]
+
+
+@pytest.mark.parametrize('cells, winner', [
+    ([(7, 3), (7, 4), (7, 5), (7, 6), (7, 7)], Player.X),  # Горизонталь.
+    ([(3, 0), (4, 0), (5, 0), (6, 0), (7, 0)], Player.X),  # Вертикаль у края.
+    ([(10, 10), (11, 11), (12, 12), (13, 13), (14, 14)], Player.X),  # Диагональ в угол.
+    ([(0, 14), (1, 13), (2, 12), (3, 11), (4, 10)], Player.X),  # Антидиагональ.
+    ([(7, 3), (7, 4), (7, 5), (7, 6), (8, 8)], None),  # Четыре в ряд.
+])
+def test_five_in_a_row(cells, winner) -> None:
+    game = Gomoku()
+    # Последний камень ставится в середину линии, чтобы проверить обе стороны.
+    order = cells[:2] + cells[3:] + cells[2:3]
+    for i, (row, col) in enumerate(order):
+        game.make_turn(Player.X, row=row, col=col)
+        assert game.winner() is (winner if i == len(order) - 1 else None)
+        if not game.is_finished():
+            row, col = O_CELLS[i]
+            game.make_turn(Player.O, row=row, col=col)
+    assert game.is_finished() == (winner is not None)
+
+
+def test_matches_tictactoe_on_3x3() -> None:
+    rng = random.Random(2019)
+    for _ in range(300):
+        game = TicTacToe()
+        gomoku = Gomoku(3, 3)
+        while not game.is_finished():
+            player = game.current_player()
+            assert player is not None and gomoku.current_player() == player
+            row, col = rng.choice([(row, col) for row in range(3) for col in range(3)
+                                   if game.can_make_turn(player, row=row, col=col)])
+            gomoku.make_turn(player, row=row, col=col)
+            game.make_turn(player, row=row, col=col)
+            assert gomoku.field == game.field
+            assert gomoku.winner() == game.winner()
+            assert gomoku.is_finished() == game.is_finished()
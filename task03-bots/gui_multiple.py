@@ -1,21 +1,68 @@
 #!/usr/bin/env python3
+import queue
 import tkinter
 import traceback
-from typing import Callable, Dict, Optional
+from typing import Callable, Dict, List, Optional, Tuple
 from alarm_user_handler import AlarmUserHandler
 from bot import UserIndependentBot
 
 
+MAX_LINES = 1000
+DRAIN_INTERVAL_MS = 20
+
+
+class UpdateQueue:
+    """Очередь строк для вывода в чаты. Tk можно вызывать только из главного потока,
+    поэтому обработчики из других потоков кладут строки сюда, а главный поток
+    раз в interval_ms миллисекунд выводит все накопившиеся строки каждого чата
+    одной вставкой."""
+    def __init__(self) -> None:
+        self.queue: 'queue.SimpleQueue[Tuple[UserWidget, str]]' = queue.SimpleQueue()
+
+    def put(self, widget: 'UserWidget', line: str) -> None:
+        """Ставит строку в очередь на вывод. Можно вызывать из любого потока."""
+        self.queue.put((widget, line))
+
+    def drain(self) -> int:
+        """Выводит все строки из очереди и возвращает их количество."""
+        pending: Dict[UserWidget, List[str]] = {}
+        count = 0
+        while True:
+            try:
+                widget, line = self.queue.get_nowait()
+            except queue.Empty:
+                break
+            pending.setdefault(widget, []).append(line)
+            count += 1
+        for widget, lines in pending.items():
+            widget.add_lines('\n'.join(lines[-widget.max_lines:]))
+        return count
+
+    def start(self, root: tkinter.Tk, interval_ms: int = DRAIN_INTERVAL_MS) -> None:
+        """Запускает периодический вывод очереди в цикле событий root."""
+        def tick() -> None:
+            self.drain()
+            root.after(interval_ms, tick)
+        root.after(interval_ms, tick)
+
+
 class UserWidget(tkinter.LabelFrame):
     """Класс, реализующий графический интерфейс для работы с одним пользователем."""
     def __init__(self,
                  text: str,
                  send_message_cb: Callable[[str], None],
-                 master: Optional[tkinter.Tk] = None):
+                 master: Optional[tkinter.Tk] = None,
+                 updates: Optional[UpdateQueue] = None,
+                 max_lines: int = MAX_LINES):
         """Конструктор.
-        send_message_cb - функция, которую нужно вызвать, чтобы отправить сообщение боту."""
+        send_message_cb - функция, которую нужно вызвать, чтобы отправить сообщение боту.
+        updates - очередь, через которую выводятся сообщения; без неё received_message
+            можно вызывать только из главного потока.
+        max_lines - сколько последних строк чата хранить."""
         super().__init__(master, text=text)
         self.send_message_cb = send_message_cb
+        self.updates = updates
+        self.max_lines = max_lines
         self.create_widgets()
 
     def create_widgets(self) -> None:
@@ -36,25 +83,39 @@ class UserWidget(tkinter.LabelFrame):
     def received_message(self, message: str) -> None:
         """Эту функцию вызывает бот для отправки сообщения пользователю.
         Она печатает сообщение в чат."""
-        self.add_lines(message)
+        self.print_line(message)
 
     def send_message(self) -> None:
         """Эта функция вызвается при отправке сообщения пользователем.
         Отправляет сообщение боту и печатает его в чат."""
         message = self.new_command.get()  # type: ignore
         self.new_command.delete(0, len(message))
-        self.add_lines('> ' + message)
+        self.print_line('> ' + message)
         self.send_message_cb(message)
 
+    def print_line(self, line: str) -> None:
+        """Печатает строку в чат сразу или через очередь, если она есть."""
+        if self.updates is None:
+            self.add_lines(line)
+        else:
+            self.updates.put(self, line)
+
     def add_lines(self, line: str) -> None:
-        """Печатает текст в чат пользователя."""
+        """Печатает текст в чат пользователя, оставляя не больше max_lines последних строк."""
         self.lines.configure(state=tkinter.NORMAL)
         self.lines.insert(tkinter.END, line + '\n')  # type: ignore
+        # После последнего перевода строки Text хранит ещё одну пустую строку.
+        last_line = int(self.lines.index('end-1c').split('.', maxsplit=1)[0])
+        extra = last_line - 1 - self.max_lines
+        if extra > 0:
+            self.lines.delete('1.0', f'{extra + 1}.0')
         self.lines.configure(state=tkinter.DISABLED)
+        self.lines.see(tkinter.END)
 
 
 def main() -> None:
     user_widgets: Dict[int, UserWidget] = {}
+    updates = UpdateQueue()
 
     bot = UserIndependentBot(
         send_message=lambda user_id, message: user_widgets[user_id].received_message(message),
@@ -71,7 +132,8 @@ def main() -> None:
         user_widgets[user_id] = UserWidget(
             f'User #{user_id}',
             lambda message: handle_message(user_id, message),
-            root
+            root,
+            updates
         )
 
     root = tkinter.Tk()
@@ -96,6 +158,7 @@ def main() -> None:
             )
             user_id += 1
 
+    updates.start(root)
     root.mainloop()
 
 
@@ -0,0 +1,60 @@
+import threading
+import tkinter
+from typing import List
+import pytest
+from gui_multiple import UpdateQueue, UserWidget
+
+
+class FakeWidget:
+    def __init__(self, max_lines: int = 1000) -> None:
+        self.max_lines = max_lines
+        self.inserts: List[str] = []
+
+    def add_lines(self, line: str) -> None:
+        self.inserts.append(line)
+
+
+def test_update_queue_coalesces() -> None:
+    updates = UpdateQueue()
+    first, second = FakeWidget(), FakeWidget(max_lines=2)
+    for widget, line in [(first, 'a'), (second, 'b'), (first, 'c'), (second, 'd'),
+                         (second, 'e')]:
+        updates.put(widget, line)  # type: ignore
+    assert updates.drain() == 5
+    assert first.inserts == ['a\nc']
+    assert second.inserts == ['d\ne']
+    assert updates.drain() == 0
+    assert first.inserts == ['a\nc']
+
+
+@pytest.fixture(name='root')
+def tk_root():
+    try:
+        tk = tkinter.Tk()
+    except tkinter.TclError:
+        pytest.skip('no display, run under a virtual one, e.g. xvfb-run pytest')
+    yield tk
+    tk.destroy()
+
+
+def test_stress_from_threads(root) -> None:
+    updates = UpdateQueue()
+    widgets = [UserWidget(f'User #{i}', lambda message: None, root, updates, max_lines=100)
+               for i in range(4)]
+
+    def flood(widget: UserWidget) -> None:
+        for i in range(5000):
+            widget.received_message(f'message {i}')
+    threads = [threading.Thread(target=flood, args=(widget,)) for widget in widgets]
+    for thread in threads:
+        thread.start()
+    while any(thread.is_alive() for thread in threads):
+        updates.drain()
+        root.update()
+    for thread in threads:
+        thread.join()
+    updates.drain()
+    root.update()
+    for widget in widgets:
+        lines = widget.lines.get('1.0', 'end-1c').splitlines()  # type: ignore
+        assert lines == [f'message {i}' for i in range(4900, 5000)]
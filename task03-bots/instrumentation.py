@@ -0,0 +1,274 @@
+import sys
+import json
+import time
+import threading
+import traceback
+import collections
+from typing import Any, Callable, Collection, Deque, Dict, List, Optional, Tuple, Type, TypeVar
+from bot import Bot, UserHandler
+from scheduler import Scheduler
+
+B = TypeVar('B', bound=Bot)
+H = TypeVar('H', bound=UserHandler)
+
+
+class Histogram:
+    """Гистограмма длительностей с корзинами по степеням двойки микросекунд:
+    память не зависит от количества измерений, точность -- в пределах двух раз."""
+    __slots__ = ('buckets', 'count', 'total', 'max')
+
+    def __init__(self) -> None:
+        self.buckets: Dict[int, int] = {}
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def add(self, seconds: float) -> None:
+        bucket = int(seconds * 1e6).bit_length()
+        self.buckets[bucket] = self.buckets.get(bucket, 0) + 1
+        self.count += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+
+    def percentile(self, q: float) -> float:
+        """Верхняя граница корзины, в которую попадает q-я доля измерений, в секундах."""
+        rank = q * self.count
+        seen = 0
+        for bucket in sorted(self.buckets):
+            seen += self.buckets[bucket]
+            if seen >= rank:
+                return min((1 << bucket) / 1e6, self.max)
+        return self.max
+
+    def to_json(self) -> Dict[str, Any]:
+        return {
+            'count': self.count,
+            'mean_s': self.total / self.count if self.count else 0.0,
+            'p50_s': self.percentile(0.5),
+            'p99_s': self.percentile(0.99),
+            'max_s': self.max,
+            'buckets_us': {str(1 << bucket): n for bucket, n in sorted(self.buckets.items())},
+        }
+
+
+class Metrics:
+    """Счётчики, текущие значения и гистограммы, которые можно менять из разных потоков."""
+    def __init__(self, clock: Callable[[], float] = time.monotonic) -> None:
+        self.clock = clock
+        self.started = clock()
+        self.lock = threading.Lock()
+        self.counters: Dict[str, int] = collections.defaultdict(int)
+        self.gauges: Dict[str, float] = {}
+        self.histograms: Dict[str, Histogram] = collections.defaultdict(Histogram)
+        self.slow_stacks: Deque[Dict[str, Any]] = collections.deque(maxlen=100)
+        self.last_snapshot: Tuple[float, Dict[str, int]] = (self.started, {})
+
+    def count(self, name: str, value: int = 1) -> None:
+        with self.lock:
+            self.counters[name] += value
+
+    def gauge(self, name: str, value: float) -> None:
+        with self.lock:
+            self.gauges[name] = value
+
+    def observe(self, name: str, seconds: float) -> None:
+        with self.lock:
+            self.histograms[name].add(seconds)
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Возвращает все метрики в виде, пригодном для json.dump. Скорости счётчиков
+        (в секунду) считаются с момента предыдущего снимка."""
+        with self.lock:
+            now = self.clock()
+            last_time, last_counters = self.last_snapshot
+            elapsed = max(now - last_time, 1e-9)
+            counters = dict(self.counters)
+            self.last_snapshot = (now, counters)
+            return {
+                'uptime_s': now - self.started,
+                'counters': counters,
+                'rates_per_s': {name: (value - last_counters.get(name, 0)) / elapsed
+                                for name, value in counters.items()},
+                'gauges': dict(self.gauges),
+                'histograms': {name: histogram.to_json()
+                               for name, histogram in self.histograms.items()},
+                'slow_stacks': list(self.slow_stacks),
+            }
+
+    def write_json(self, path: str) -> None:
+        with open(path, 'w', encoding='utf-8') as out_file:
+            json.dump(self.snapshot(), out_file, indent=2)
+
+    def report_every(self, interval: float, path: str,
+                     scheduler: Optional[Scheduler] = None) -> 'Reporter':
+        """Записывает снимок метрик в path каждые interval секунд, пока не будет вызван
+        stop() у возвращённого объекта. По умолчанию отчёты пишутся из отдельного потока-демона,
+        который не мешает программе завершиться. Если передан свой scheduler с обычным
+        потоком, stop() обязателен: иначе программа не завершится."""
+        if scheduler is None:
+            scheduler = Scheduler(daemon=True)
+        return Reporter(self, interval, path, scheduler)
+
+
+class Reporter:
+    """Периодическая запись снимков метрик, см. Metrics.report_every."""
+    def __init__(self, metrics: Metrics, interval: float, path: str,
+                 scheduler: Scheduler) -> None:
+        self.metrics = metrics
+        self.interval = interval
+        self.path = path
+        self.scheduler = scheduler
+        self.lock = threading.Lock()
+        self.stopped = False
+        self.timer = scheduler.call_later(interval, self.report)
+
+    def report(self) -> None:
+        try:
+            self.metrics.write_json(self.path)
+        except Exception:  # pylint: disable=W0703
+            traceback.print_exc()
+        with self.lock:
+            if not self.stopped:
+                self.timer = self.scheduler.call_later(self.interval, self.report)
+
+    def stop(self) -> None:
+        """Отменяет следующие отчёты."""
+        with self.lock:
+            self.stopped = True
+            self.scheduler.cancel(self.timer)
+
+
+class SlowMessageSampler:
+    """Поток, который каждые interval секунд смотрит на обрабатываемые сообщения и
+    сохраняет в metrics.slow_stacks стек потока, обрабатывающего сообщение дольше threshold.
+    Стек снимается во время обработки, поэтому видно, где именно она застряла."""
+    def __init__(self, metrics: Metrics, threshold: float, interval: float = 0.01) -> None:
+        self.metrics = metrics
+        self.threshold = threshold
+        self.interval = interval
+        # Номер потока -> стек вложенных измерений: бот и его обработчик измеряются
+        # в одном потоке, и выход из внутреннего не должен терять внешнее.
+        self.active: Dict[int, List['Timed']] = {}
+        self.stopped = threading.Event()
+        self.thread = threading.Thread(target=self.run, name='slow-sampler', daemon=True)
+        self.thread.start()
+
+    def run(self) -> None:
+        while not self.stopped.wait(self.interval):
+            now = self.metrics.clock()
+            frames = sys._current_frames()  # pylint: disable=protected-access
+            for thread_id, timings in list(self.active.items()):
+                frame = frames.get(thread_id)
+                slow = [timed for timed in list(timings)
+                        if not timed.sampled and now - timed.start >= self.threshold]
+                if frame is None or not slow:
+                    continue
+                # Один стек на поток, под именем самого вложенного долгого измерения.
+                self.metrics.slow_stacks.append({
+                    'name': slow[-1].name,
+                    'elapsed_s': now - slow[-1].start,
+                    'stack': traceback.format_stack(frame),
+                })
+                for timed in slow:
+                    timed.sampled = True
+
+    def stop(self) -> None:
+        self.stopped.set()
+        self.thread.join()
+
+
+class Timed:
+    """Измеряет вызов: пишет длительность в гистограмму name и сообщает семплеру о начале."""
+    __slots__ = ('metrics', 'name', 'sampler', 'start', 'sampled')
+
+    def __init__(self, metrics: Metrics, name: str,
+                 sampler: Optional[SlowMessageSampler]) -> None:
+        self.metrics = metrics
+        self.name = name
+        self.sampler = sampler
+        self.start = 0.0
+        self.sampled = False
+
+    def __enter__(self) -> None:
+        self.start = self.metrics.clock()
+        if self.sampler is not None:
+            self.sampler.active.setdefault(threading.get_ident(), []).append(self)
+
+    def __exit__(self, *exc_info: Any) -> None:
+        elapsed = self.metrics.clock() - self.start
+        if self.sampler is not None:
+            thread_id = threading.get_ident()
+            timings = self.sampler.active[thread_id]
+            timings.pop()
+            if not timings:
+                del self.sampler.active[thread_id]
+            if elapsed >= self.sampler.threshold:
+                self.metrics.count(f'{self.name}.slow')
+        self.metrics.observe(self.name, elapsed)
+
+
+def instrument_bot(bot_class: Type[B], metrics: Optional[Metrics],
+                   sampler: Optional[SlowMessageSampler] = None) -> Type[B]:
+    """Возвращает наследника bot_class, который считает входящие и исходящие сообщения
+    (в том числе отправленные через свой send_many транспорта, по получателю на каждое),
+    время handle_message и, если у бота есть поле users, количество активных пользователей.
+    Если metrics равно None, возвращает bot_class без изменений, то есть без накладных расходов."""
+    if metrics is None:
+        return bot_class
+    enabled: Metrics = metrics
+    name = bot_class.__name__
+
+    class InstrumentedBot(bot_class):  # type: ignore
+        def __init__(self, send_message: Callable[[int, str], None], *args: Any,
+                     **kwargs: Any) -> None:
+            def counted_send_message(to_user_id: int, message: str) -> None:
+                enabled.count(f'{name}.sends')
+                send_message(to_user_id, message)
+            super(InstrumentedBot, self).__init__(counted_send_message, *args, **kwargs)
+            bot: Bot = self
+            send_many = bot.send_many
+            # send_to_each и так вызывает посчитанный send_message.
+            if send_many != bot.send_to_each:  # pylint: disable=W0143
+                def counted_send_many(user_ids: Collection[int], message: str) -> None:
+                    enabled.count(f'{name}.sends', len(user_ids))
+                    send_many(user_ids, message)
+                bot.send_many = counted_send_many
+
+        def handle_message(self, from_user_id: int, message: str) -> None:
+            enabled.count(f'{name}.messages')
+            with Timed(enabled, f'{name}.handle_message', sampler):
+                super(InstrumentedBot, self).handle_message(from_user_id, message)
+            users = getattr(self, 'users', None)
+            if users is not None:
+                enabled.gauge(f'{name}.active_users', len(users))
+
+    InstrumentedBot.__name__ = InstrumentedBot.__qualname__ = f'Instrumented{name}'
+    return InstrumentedBot
+
+
+def instrument_user_handler(handler_class: Type[H], metrics: Optional[Metrics],
+                            sampler: Optional[SlowMessageSampler] = None) -> Type[H]:
+    """Аналог instrument_bot для обработчика пользователя: дополнительно считает
+    созданные обработчики, по скорости роста этого счётчика видна частота создания."""
+    if metrics is None:
+        return handler_class
+    enabled: Metrics = metrics
+    name = handler_class.__name__
+
+    class InstrumentedUserHandler(handler_class):  # type: ignore
+        def __init__(self, send_message: Callable[[str], None], *args: Any,
+                     **kwargs: Any) -> None:
+            enabled.count(f'{name}.created')
+
+            def counted_send_message(message: str) -> None:
+                enabled.count(f'{name}.sends')
+                send_message(message)
+            super(InstrumentedUserHandler, self).__init__(counted_send_message, *args, **kwargs)
+
+        def handle_message(self, message: str) -> None:
+            enabled.count(f'{name}.messages')
+            with Timed(enabled, f'{name}.handle_message', sampler):
+                super(InstrumentedUserHandler, self).handle_message(message)
+
+    InstrumentedUserHandler.__name__ = InstrumentedUserHandler.__qualname__ = f'Instrumented{name}'
+    return InstrumentedUserHandler
@@ -0,0 +1,159 @@
+import sys
+import json
+import time
+import pathlib
+import subprocess
+import threading
+import pytest_mock
+from bot import UserHandler, UserIndependentBot
+from chat_bot import ChatBot
+from instrumentation import (Histogram, Metrics, SlowMessageSampler, Timed, instrument_bot,
+                             instrument_user_handler)
+from scheduler import Scheduler
+from scheduler_test import FakeClock
+
+
+class EchoUserHandler(UserHandler):
+    def handle_message(self, message: str) -> None:
+        self.send_message(message)
+        self.send_message(message)
+
+
+class SlowUserHandler(UserHandler):
+    release = threading.Event()
+
+    def handle_message(self, message: str) -> None:
+        self.release.wait(1)
+
+
+def test_disabled_returns_same_class() -> None:
+    assert instrument_bot(ChatBot, None) is ChatBot
+    assert instrument_user_handler(EchoUserHandler, None) is EchoUserHandler
+
+
+def test_histogram() -> None:
+    histogram = Histogram()
+    for microseconds in [1, 2, 3, 100, 1000]:
+        histogram.add(microseconds / 1e6)
+    assert histogram.count == 5
+    assert histogram.percentile(0.5) == 4 / 1e6
+    assert histogram.percentile(1) == 1000 / 1e6
+    assert histogram.max == 1000 / 1e6
+
+
+def test_instrumented_bot(mocker: pytest_mock.MockFixture) -> None:
+    send_message = mocker.stub(name='send_message_stub')
+    clock = FakeClock()
+    metrics = Metrics(clock)
+    bot_class = instrument_bot(UserIndependentBot, metrics)
+    handler_class = instrument_user_handler(EchoUserHandler, metrics)
+    assert bot_class.__name__ == 'InstrumentedUserIndependentBot'
+    bot = bot_class(send_message, handler_class)  # type: ignore
+    for user_id in [1, 2, 1]:
+        bot.handle_message(user_id, 'hi')
+    assert send_message.call_args_list == [mocker.call(1, 'hi'), mocker.call(1, 'hi'),
+                                           mocker.call(2, 'hi'), mocker.call(2, 'hi'),
+                                           mocker.call(1, 'hi'), mocker.call(1, 'hi')]
+    clock.now = 2
+    snapshot = metrics.snapshot()
+    assert snapshot['counters'] == {
+        'UserIndependentBot.messages': 3,
+        'UserIndependentBot.sends': 6,
+        'EchoUserHandler.created': 2,
+        'EchoUserHandler.messages': 3,
+        'EchoUserHandler.sends': 6,
+    }
+    assert snapshot['rates_per_s']['EchoUserHandler.created'] == 1
+    assert snapshot['gauges'] == {'UserIndependentBot.active_users': 2}
+    assert snapshot['histograms']['EchoUserHandler.handle_message']['count'] == 3
+    clock.now = 3
+    assert metrics.snapshot()['rates_per_s']['EchoUserHandler.created'] == 0
+
+
+def test_instrumented_bot_counts_send_many(mocker: pytest_mock.MockFixture) -> None:
+    send_message = mocker.stub(name='send_message_stub')
+    send_many = mocker.stub(name='send_many_stub')
+    metrics = Metrics()
+    bot = instrument_bot(ChatBot, metrics)(send_message, send_many=send_many)
+    for user_id in [1, 2, 3]:
+        bot.handle_message(user_id, 'hi')
+    assert send_message.call_count == 0
+    assert send_many.call_count == 3
+    assert metrics.counters['ChatBot.sends'] == 1 + 2 + 3
+    bot = instrument_bot(ChatBot, metrics)(send_message)
+    bot.handle_message(1, 'hi')
+    assert metrics.counters['ChatBot.sends'] == 1 + 2 + 3 + 1
+
+
+def test_report_every(tmp_path: pathlib.Path) -> None:
+    clock = FakeClock()
+    scheduler = Scheduler(clock, threaded=False)
+    metrics = Metrics(clock)
+    path = tmp_path / 'metrics.json'
+    reporter = metrics.report_every(10, str(path), scheduler)
+    metrics.count('x')
+    clock.now = 10
+    scheduler.run_pending()
+    assert json.loads(path.read_text())['counters'] == {'x': 1}
+    metrics.count('x')
+    clock.now = 20
+    scheduler.run_pending()
+    assert json.loads(path.read_text())['counters'] == {'x': 2}
+    reporter.stop()
+    assert scheduler.pending_count() == 0
+
+
+def test_report_write_error_keeps_reporting(tmp_path: pathlib.Path, capsys) -> None:
+    clock = FakeClock()
+    scheduler = Scheduler(clock, threaded=False)
+    metrics = Metrics(clock)
+    metrics.report_every(1, str(tmp_path / 'missing' / 'metrics.json'), scheduler)
+    clock.now = 1
+    assert scheduler.run_pending() == 1
+    assert 'FileNotFoundError' in capsys.readouterr().err
+    assert scheduler.pending_count() == 1
+
+
+def test_default_reporter_does_not_block_exit(tmp_path: pathlib.Path) -> None:
+    path = str(tmp_path / 'metrics.json')
+    code = f'import instrumentation; instrumentation.Metrics().report_every(0.01, {path!r})'
+    subprocess.run([sys.executable, '-c', code], cwd=pathlib.Path(__file__).parent,
+                   check=True, timeout=10)
+
+
+def test_slow_message_stack() -> None:
+    SlowUserHandler.release.clear()
+    metrics = Metrics()
+    sampler = SlowMessageSampler(metrics, threshold=0.02, interval=0.005)
+    handler = instrument_user_handler(SlowUserHandler, metrics, sampler)(print)
+    thread = threading.Thread(target=handler.handle_message, args=('hi',))
+    thread.start()
+    deadline = time.monotonic() + 5
+    while not metrics.slow_stacks and time.monotonic() < deadline:
+        time.sleep(0.005)
+    SlowUserHandler.release.set()
+    thread.join()
+    sampler.stop()
+    stack = metrics.slow_stacks[0]
+    assert stack['name'] == 'SlowUserHandler.handle_message'
+    assert any('self.release.wait(1)' in line for line in stack['stack'])
+    assert metrics.counters['SlowUserHandler.handle_message.slow'] == 1
+
+
+def test_nested_timings_share_sampler() -> None:
+    clock = FakeClock()
+    metrics = Metrics(clock)
+    sampler = SlowMessageSampler(metrics, threshold=0.5, interval=0.001)
+    thread_id = threading.get_ident()
+    with Timed(metrics, 'outer', sampler):
+        with Timed(metrics, 'inner', sampler):
+            assert [timed.name for timed in sampler.active[thread_id]] == ['outer', 'inner']
+            clock.now = 1
+            deadline = time.monotonic() + 5
+            while not metrics.slow_stacks and time.monotonic() < deadline:
+                time.sleep(0.001)
+        assert [timed.name for timed in sampler.active[thread_id]] == ['outer']
+    sampler.stop()
+    assert thread_id not in sampler.active
+    assert [stack['name'] for stack in metrics.slow_stacks] == ['inner']
+    assert metrics.counters['outer.slow'] == metrics.counters['inner.slow'] == 1
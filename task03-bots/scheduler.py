@@ -0,0 +1,135 @@
+import heapq
+import itertools
+import threading
+import time
+import traceback
+from typing import Callable, List, Optional
+
+
+class Timer:
+    """Запись об одном отложенном вызове. Занимает несколько слов памяти.
+    fired -- таймер уже извлечён из кучи для вызова, отменить его нельзя."""
+    __slots__ = ('deadline', 'seq', 'callback', 'cancelled', 'fired')
+
+    def __init__(self, deadline: float, seq: int, callback: Callable[[], None]) -> None:
+        self.deadline = deadline
+        self.seq = seq
+        self.callback = callback
+        self.cancelled = False
+        self.fired = False
+
+    def __lt__(self, other: 'Timer') -> bool:
+        return (self.deadline, self.seq) < (other.deadline, other.seq)
+
+
+class Scheduler:
+    """Планировщик отложенных вызовов: все таймеры хранятся в одной куче
+    и срабатывают в одном потоке, а не в отдельном потоке на каждый таймер.
+    Поток запускается при появлении таймеров и завершается, когда их не осталось,
+    так что программа не завершится, пока есть несработавшие таймеры.
+    clock -- функция, возвращающая текущее время в секундах.
+    threaded -- запускать ли поток. Без потока таймеры срабатывают только при явном
+        вызове run_pending, что вместе с подменённым clock удобно для тестов.
+    daemon -- сделать ли поток демоном: тогда программа может завершиться,
+        не дожидаясь оставшихся таймеров."""
+    def __init__(self, clock: Callable[[], float] = time.monotonic,
+                 threaded: bool = True, daemon: bool = False) -> None:
+        self.clock = clock
+        self.threaded = threaded
+        self.daemon = daemon
+        self.heap: List[Timer] = []
+        self.cancelled = 0
+        self.counter = itertools.count()
+        self.condition = threading.Condition()
+        self.thread: Optional[threading.Thread] = None
+
+    def call_later(self, delay: float, callback: Callable[[], None]) -> Timer:
+        """Планирует вызов callback через delay секунд и возвращает таймер для отмены."""
+        with self.condition:
+            timer = Timer(self.clock() + delay, next(self.counter), callback)
+            heapq.heappush(self.heap, timer)
+            if self.threaded and self.thread is None:
+                self.thread = threading.Thread(target=self.run, name='scheduler',
+                                               daemon=self.daemon)
+                self.thread.start()
+            self.condition.notify()
+        return timer
+
+    def cancel(self, timer: Timer) -> None:
+        """Отменяет таймер. Отменённые таймеры удаляются из кучи лениво, но их доля
+        не превышает половины, так что память ограничена числом активных таймеров.
+        Отмена уже сработавшего или отменённого таймера ничего не делает."""
+        with self.condition:
+            if timer.cancelled or timer.fired:
+                return
+            timer.cancelled = True
+            self.cancelled += 1
+            if self.cancelled * 2 > len(self.heap):
+                self.heap = [t for t in self.heap if not t.cancelled]
+                heapq.heapify(self.heap)
+                self.cancelled = 0
+            self.condition.notify()
+
+    def pending_count(self) -> int:
+        """Количество активных таймеров."""
+        with self.condition:
+            return len(self.heap) - self.cancelled
+
+    def next_delay(self) -> Optional[float]:
+        """Возвращает время до ближайшего таймера или None, если таймеров нет."""
+        with self.condition:
+            while self.heap and self.heap[0].cancelled:
+                heapq.heappop(self.heap)
+                self.cancelled -= 1
+            if not self.heap:
+                return None
+            return self.heap[0].deadline - self.clock()
+
+    def run_pending(self) -> int:
+        """Вызывает все таймеры, время которых наступило, и возвращает их количество."""
+        due = []
+        with self.condition:
+            now = self.clock()
+            while self.heap and self.heap[0].deadline <= now:
+                timer = heapq.heappop(self.heap)
+                if timer.cancelled:
+                    self.cancelled -= 1
+                else:
+                    timer.fired = True
+                    due.append(timer)
+        for timer in due:
+            try:
+                timer.callback()
+            except Exception:  # pylint: disable=W0703
+                traceback.print_exc()
+        return len(due)
+
+    def run(self) -> None:
+        """Основной цикл потока планировщика."""
+        try:
+            while True:
+                with self.condition:
+                    delay = self.next_delay()
+                    if delay is None:
+                        self.thread = None
+                        return
+                    if delay > 0:
+                        self.condition.wait(delay)
+                        continue
+                self.run_pending()
+        finally:
+            # Если поток завершился из-за исключения, следующий call_later запустит новый.
+            with self.condition:
+                if self.thread is threading.current_thread():
+                    self.thread = None
+
+
+DEFAULT_SCHEDULER: Optional[Scheduler] = None
+
+
+def default_scheduler() -> Scheduler:
+    """Возвращает общий для всей программы планировщик."""
+    global DEFAULT_SCHEDULER
+    if DEFAULT_SCHEDULER is None:
+        DEFAULT_SCHEDULER = Scheduler()
+    return DEFAULT_SCHEDULER
@@ -0,0 +1,115 @@
+import functools
+import threading
+from typing import List
+from scheduler import Scheduler
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_timers_fire_in_order() -> None:
+    clock = FakeClock()
+    scheduler = Scheduler(clock, threaded=False)
+    fired: List[str] = []
+    scheduler.call_later(2, lambda: fired.append('b'))
+    scheduler.call_later(1, lambda: fired.append('a'))
+    scheduler.call_later(2, lambda: fired.append('c'))
+    assert scheduler.next_delay() == 1
+    assert scheduler.run_pending() == 0
+    clock.now = 1.5
+    assert scheduler.run_pending() == 1
+    assert fired == ['a']
+    assert scheduler.next_delay() == 0.5
+    clock.now = 2
+    assert scheduler.run_pending() == 2
+    assert fired == ['a', 'b', 'c']
+    assert scheduler.next_delay() is None
+    assert scheduler.pending_count() == 0
+
+
+def test_cancel() -> None:
+    clock = FakeClock()
+    scheduler = Scheduler(clock, threaded=False)
+    fired: List[int] = []
+    timers = [scheduler.call_later(i, functools.partial(fired.append, i)) for i in range(10)]
+    scheduler.cancel(timers[0])
+    scheduler.cancel(timers[0])
+    scheduler.cancel(timers[5])
+    assert scheduler.pending_count() == 8
+    assert scheduler.next_delay() == 1
+    clock.now = 100
+    assert scheduler.run_pending() == 8
+    assert fired == [1, 2, 3, 4, 6, 7, 8, 9]
+
+
+def test_cancel_fired_timer_does_nothing() -> None:
+    clock = FakeClock()
+    scheduler = Scheduler(clock, threaded=False)
+    first = scheduler.call_later(1, lambda: None)
+    clock.now = 1
+    assert scheduler.run_pending() == 1
+    timers = [scheduler.call_later(i, lambda: None) for i in range(1, 4)]
+    scheduler.cancel(first)
+    assert scheduler.pending_count() == 3
+    assert scheduler.cancelled == 0
+    scheduler.cancel(timers[0])
+    assert scheduler.pending_count() == 2
+    clock.now = 10
+    assert scheduler.run_pending() == 2
+
+
+def test_cancelled_timers_are_compacted() -> None:
+    scheduler = Scheduler(FakeClock(), threaded=False)
+    timers = [scheduler.call_later(i, lambda: None) for i in range(100)]
+    for timer in timers[:60]:
+        scheduler.cancel(timer)
+    assert scheduler.pending_count() == 40
+    assert len(scheduler.heap) < 60
+
+
+def test_thread_fires_and_stops() -> None:
+    scheduler = Scheduler()
+    fired = threading.Event()
+    scheduler.call_later(0.01, fired.set)
+    cancelled = scheduler.call_later(0.02, fired.clear)
+    scheduler.cancel(cancelled)
+    thread = scheduler.thread
+    assert thread is not None
+    assert fired.wait(5)
+    thread.join(5)
+    assert not thread.is_alive()
+    assert scheduler.thread is None
+    assert fired.is_set()
+
+
+def fail() -> None:
+    raise ValueError('callback failed')
+
+
+def test_failing_callback_does_not_stop_other_timers(capsys) -> None:
+    clock = FakeClock()
+    scheduler = Scheduler(clock, threaded=False)
+    fired: List[int] = []
+    scheduler.call_later(1, fail)
+    scheduler.call_later(1, functools.partial(fired.append, 1))
+    clock.now = 1
+    assert scheduler.run_pending() == 2
+    assert fired == [1]
+    assert 'callback failed' in capsys.readouterr().err
+
+
+def test_thread_survives_failing_callback(capsys) -> None:
+    scheduler = Scheduler()
+    scheduler.call_later(0, fail)
+    fired = threading.Event()
+    scheduler.call_later(0.05, fired.set)
+    assert fired.wait(5)
+    assert 'callback failed' in capsys.readouterr().err
+    fired.clear()
+    scheduler.call_later(0.01, fired.set)
+    assert fired.wait(5)
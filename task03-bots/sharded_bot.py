@@ -0,0 +1,77 @@
+import queue
+import threading
+import traceback
+from typing import Any, Callable, List, Optional, Tuple, Type
+from bot import Bot, UserHandler, UserIndependentBot
+
+Item = Optional[Tuple[int, str]]
+
+
+class Shard:
+    """Поток-обработчик одной части пользователей со своей очередью сообщений
+    и своим UserIndependentBot, к которому обращается только этот поток."""
+    def __init__(self, bot: UserIndependentBot, queue_size: int, name: str) -> None:
+        self.bot = bot
+        self.queue: 'queue.Queue[Item]' = queue.Queue(queue_size)
+        self.thread = threading.Thread(target=self.run, name=name, daemon=True)
+        self.thread.start()
+
+    def run(self) -> None:
+        while True:
+            item = self.queue.get()
+            try:
+                if item is None:
+                    return
+                self.bot.handle_message(*item)
+            except Exception:  # pylint: disable=W0703
+                traceback.print_exc()
+            finally:
+                self.queue.task_done()
+
+
+class ShardedUserIndependentBot(Bot):
+    """Бот, аналогичный UserIndependentBot, но обрабатывающий сообщения в shards потоках.
+    Пользователь всегда попадает в один и тот же поток, поэтому его сообщения
+    обрабатываются по порядку, а сообщения разных пользователей -- параллельно.
+    handle_message можно вызывать из любого потока; send_message будет вызываться
+    из потоков-обработчиков, поэтому должна быть потокобезопасной.
+    queue_size -- максимальная длина очереди одного потока. Если очередь заполнена,
+        handle_message ждёт не больше put_timeout секунд (бесконечно, если None),
+        после чего выбрасывает queue.Full.
+    Остальные именованные параметры передаются в UserIndependentBot каждого потока.
+    """
+    def __init__(self, send_message: Callable[[int, str], None], user_handler: Type[UserHandler],
+                 shards: int = 4, queue_size: int = 1000, put_timeout: Optional[float] = None,
+                 **kwargs: Any) -> None:
+        super(ShardedUserIndependentBot, self).__init__(send_message)
+        self.put_timeout = put_timeout
+        self.shards: List[Shard] = [
+            Shard(UserIndependentBot(send_message, user_handler, **kwargs), queue_size,
+                  f'bot-shard-{i}')
+            for i in range(shards)
+        ]
+
+    def shard_for(self, user_id: int) -> Shard:
+        return self.shards[hash(user_id) % len(self.shards)]
+
+    def handle_message(self, from_user_id: int, message: str) -> None:
+        self.shard_for(from_user_id).queue.put((from_user_id, message),
+                                               timeout=self.put_timeout)
+
+    def join(self) -> None:
+        """Ждёт, пока все принятые сообщения будут обработаны."""
+        for shard in self.shards:
+            shard.queue.join()
+
+    def close(self) -> None:
+        """Обрабатывает оставшиеся сообщения и останавливает потоки."""
+        for shard in self.shards:
+            shard.queue.put(None)
+        for shard in self.shards:
+            shard.thread.join()
+
+    def __enter__(self) -> 'ShardedUserIndependentBot':
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
@@ -0,0 +1,70 @@
+import queue
+import threading
+from typing import Dict, List
+import pytest
+from bot import UserHandler
+from sharded_bot import ShardedUserIndependentBot
+
+
+class EchoUserHandler(UserHandler):
+    def handle_message(self, message: str) -> None:
+        self.send_message(message)
+
+
+class BlockingUserHandler(UserHandler):
+    release = threading.Event()
+
+    def handle_message(self, message: str) -> None:
+        self.release.wait()
+        self.send_message(message)
+
+
+class Recorder:
+    def __init__(self) -> None:
+        self.lock = threading.Lock()
+        self.received: Dict[int, List[str]] = {}
+
+    def __call__(self, to_user_id: int, message: str) -> None:
+        with self.lock:
+            self.received.setdefault(to_user_id, []).append(message)
+
+
+def test_per_user_order() -> None:
+    send_message = Recorder()
+    with ShardedUserIndependentBot(send_message, EchoUserHandler, shards=3,
+                                   queue_size=5) as bot:
+        def send_all(user_id: int) -> None:
+            for i in range(200):
+                bot.handle_message(user_id, str(i))
+        threads = [threading.Thread(target=send_all, args=(user_id,)) for user_id in range(10)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    assert send_message.received == {user_id: [str(i) for i in range(200)] for user_id in range(10)}
+
+
+def test_same_user_same_handler() -> None:
+    bot = ShardedUserIndependentBot(Recorder(), EchoUserHandler, shards=2)
+    bot.handle_message(1, 'a')
+    bot.handle_message(1, 'b')
+    bot.handle_message(2, 'c')
+    bot.join()
+    assert [len(shard.bot.users) for shard in bot.shards] == [1, 1]
+    assert bot.shard_for(1).bot.hits == 1
+    bot.close()
+
+
+def test_backpressure() -> None:
+    BlockingUserHandler.release.clear()
+    send_message = Recorder()
+    bot = ShardedUserIndependentBot(send_message, BlockingUserHandler, shards=1,
+                                    queue_size=2, put_timeout=0.01)
+    bot.handle_message(1, 'a')  # Может быть уже взято потоком.
+    bot.handle_message(1, 'b')
+    with pytest.raises(queue.Full):
+        for _ in range(2):
+            bot.handle_message(1, 'c')
+    BlockingUserHandler.release.set()
+    bot.close()
+    assert send_message.received[1][:2] == ['a', 'b']
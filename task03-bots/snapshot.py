@@ -0,0 +1,185 @@
+import os
+import sys
+import mmap
+import array
+import bisect
+import struct
+from typing import Dict, Iterator, Mapping, MutableMapping, Set, Tuple, Union
+from bot import UserIndependentBot
+from chat_bot import ChatBot
+
+# Формат файла: заголовок HEADER (сигнатура, версия, тип, количество записей N), затем
+# для KIND_STATES -- N номеров пользователей по возрастанию ('q'), N + 1 смещений состояний
+# ('Q') и сами состояния подряд; для KIND_CHAT -- N номеров пользователей в порядке появления.
+# Все числа little-endian.
+MAGIC = b'BOTS'
+VERSION = 1
+HEADER = struct.Struct('<4sBBQ')
+KIND_STATES = 1
+KIND_CHAT = 2
+
+Buffer = Union[bytes, mmap.mmap]
+
+
+class SnapshotError(Exception):
+    pass
+
+
+def to_array(typecode: str, data: bytes) -> 'array.array[int]':
+    result = array.array(typecode)
+    result.frombytes(data)
+    if sys.byteorder == 'big':
+        result.byteswap()
+    return result
+
+
+def to_bytes(values: 'array.array[int]') -> bytes:
+    if sys.byteorder == 'big':
+        values = array.array(values.typecode, values)
+        values.byteswap()
+    return values.tobytes()
+
+
+def write_file(path: str, data: bytes) -> None:
+    """Атомарно заменяет файл path, так что прерванная запись оставляет старый снимок."""
+    with open(path + '.tmp', 'wb') as out_file:
+        out_file.write(data)
+    os.replace(path + '.tmp', path)
+
+
+def check_header(path: str, data: Buffer, kind: int) -> int:
+    """Проверяет заголовок снимка и возвращает количество записей."""
+    if len(data) < HEADER.size:
+        raise SnapshotError(f'{path}: file is too short')
+    magic, version, file_kind, count = HEADER.unpack_from(data)
+    if magic != MAGIC:
+        raise SnapshotError(f'{path}: not a bot snapshot')
+    if version != VERSION:
+        raise SnapshotError(f'{path}: unsupported snapshot version {version}')
+    if file_kind != kind:
+        raise SnapshotError(f'{path}: unexpected snapshot kind {file_kind}')
+    return count
+
+
+def read_file(path: str, kind: int) -> Tuple[int, bytes]:
+    """Читает снимок целиком и проверяет заголовок. Возвращает количество записей и весь файл."""
+    with open(path, 'rb') as in_file:
+        data = in_file.read()
+    return check_header(path, data, kind), data
+
+
+def map_file(path: str, kind: int) -> Tuple[int, mmap.mmap]:
+    """Как read_file, но отображает файл в память, не читая его: байты подгружаются
+    операционной системой при обращении к ним."""
+    with open(path, 'rb') as in_file:
+        if os.fstat(in_file.fileno()).st_size < HEADER.size:
+            # Пустой файл нельзя отобразить в память.
+            raise SnapshotError(f'{path}: file is too short')
+        data = mmap.mmap(in_file.fileno(), 0, access=mmap.ACCESS_READ)
+    try:
+        return check_header(path, data, kind), data
+    except SnapshotError:
+        data.close()
+        raise
+
+
+def save_states(path: str, states: Mapping[int, bytes]) -> None:
+    """Сохраняет состояния обработчиков пользователей."""
+    user_ids = array.array('q', sorted(states))
+    offsets = array.array('Q', [0])
+    for user_id in user_ids:
+        offsets.append(offsets[-1] + len(states[user_id]))
+    write_file(path, b''.join([
+        HEADER.pack(MAGIC, VERSION, KIND_STATES, len(user_ids)),
+        to_bytes(user_ids),
+        to_bytes(offsets),
+    ] + [states[user_id] for user_id in user_ids]))
+
+
+class SnapshotStore(MutableMapping[int, bytes]):
+    """Состояния обработчиков, загруженные из снимка. Файл отображается в память, при загрузке
+    читаются только массивы номеров и смещений, состояние пользователя извлекается из
+    отображения при обращении к нему. Изменения хранятся поверх снимка и в файл
+    не записываются. close() освобождает отображение."""
+    def __init__(self, path: str) -> None:
+        count, self.data = map_file(path, KIND_STATES)
+        try:
+            ids_end = HEADER.size + count * 8
+            offsets_end = ids_end + (count + 1) * 8
+            if len(self.data) < offsets_end:
+                raise SnapshotError(f'{path}: file is truncated')
+            self.user_ids = to_array('q', self.data[HEADER.size:ids_end])
+            self.offsets = to_array('Q', self.data[ids_end:offsets_end])
+            self.blob_start = offsets_end
+            if len(self.data) != offsets_end + (self.offsets[-1] if count else 0):
+                raise SnapshotError(f'{path}: file is truncated')
+        except SnapshotError:
+            self.data.close()
+            raise
+        self.changed: Dict[int, bytes] = {}
+        self.deleted: Set[int] = set()
+
+    def find(self, user_id: int) -> int:
+        """Возвращает номер записи пользователя в снимке или -1."""
+        index = bisect.bisect_left(self.user_ids, user_id)
+        if index == len(self.user_ids) or self.user_ids[index] != user_id:
+            return -1
+        return index
+
+    def __getitem__(self, user_id: int) -> bytes:
+        if user_id in self.changed:
+            return self.changed[user_id]
+        index = self.find(user_id)
+        if index < 0 or user_id in self.deleted:
+            raise KeyError(user_id)
+        return self.data[self.blob_start + self.offsets[index]:
+                         self.blob_start + self.offsets[index + 1]]
+
+    def __setitem__(self, user_id: int, state: bytes) -> None:
+        self.changed[user_id] = state
+
+    def __delitem__(self, user_id: int) -> None:
+        in_snapshot = self.find(user_id) >= 0 and user_id not in self.deleted
+        if self.changed.pop(user_id, None) is None and not in_snapshot:
+            raise KeyError(user_id)
+        if in_snapshot:
+            self.deleted.add(user_id)
+
+    def __iter__(self) -> Iterator[int]:
+        yield from self.changed
+        for user_id in self.user_ids:
+            if user_id not in self.deleted and user_id not in self.changed:
+                yield user_id
+
+    def __len__(self) -> int:
+        added = sum(1 for user_id in self.changed
+                    if self.find(user_id) < 0 or user_id in self.deleted)
+        return len(self.user_ids) - len(self.deleted) + added
+
+    def close(self) -> None:
+        """Закрывает отображение файла, после этого состояния из снимка недоступны."""
+        self.data.close()
+
+
+def save_bot(bot: UserIndependentBot, path: str) -> None:
+    """Сохраняет состояния всех обработчиков бота, в том числе вытесненных в state_store."""
+    states: Dict[int, bytes] = dict(bot.state_store or {})
+    for user_id, handler in bot.users.items():
+        state = handler.dump_state()
+        if state is None:
+            states.pop(user_id, None)
+        else:
+            states[user_id] = state
+    save_states(path, states)
+
+
+def save_chat_bot(bot: ChatBot, path: str) -> None:
+    user_ids = array.array('q', bot.users)
+    write_file(path, HEADER.pack(MAGIC, VERSION, KIND_CHAT, len(user_ids)) + to_bytes(user_ids))
+
+
+def load_chat_bot(bot: ChatBot, path: str) -> None:
+    count, data = read_file(path, KIND_CHAT)
+    if len(data) != HEADER.size + count * 8:
+        raise SnapshotError(f'{path}: file is truncated')
+    bot.users = dict.fromkeys(to_array('q', data[HEADER.size:]))
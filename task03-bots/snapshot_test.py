@@ -0,0 +1,97 @@
+import mmap
+import pathlib
+import pytest
+import pytest_mock
+from bot import UserIndependentBot
+from chat_bot import ChatBot
+from snapshot import (SnapshotError, SnapshotStore, load_chat_bot, save_bot, save_chat_bot,
+                      save_states)
+from tictactoe_user_handler import TicTacToeUserHandler
+
+
+def test_store_roundtrip(tmp_path: pathlib.Path) -> None:
+    path = str(tmp_path / 'states.bin')
+    save_states(path, {5: b'five', -1: b'', 2 ** 40: b'big'})
+    store = SnapshotStore(path)
+    assert dict(store) == {5: b'five', -1: b'', 2 ** 40: b'big'}
+    assert 3 not in store
+    store[3] = b'three'
+    store[5] = b'FIVE'
+    del store[-1]
+    assert store.pop(2 ** 40) == b'big'
+    assert dict(store) == {3: b'three', 5: b'FIVE'}
+    assert len(store) == 2
+    del store[5]
+    with pytest.raises(KeyError):
+        del store[5]
+    assert dict(store) == {3: b'three'}
+    assert len(store) == 1
+
+
+def test_store_maps_file(tmp_path: pathlib.Path) -> None:
+    path = str(tmp_path / 'states.bin')
+    save_states(path, {1: b'one', 2: b'two'})
+    store = SnapshotStore(path)
+    assert isinstance(store.data, mmap.mmap)
+    assert store[2] == b'two'
+    store.close()
+    assert store.data.closed
+
+
+def test_store_empty(tmp_path: pathlib.Path) -> None:
+    path = str(tmp_path / 'states.bin')
+    save_states(path, {})
+    assert len(SnapshotStore(path)) == 0
+
+
+def test_bad_files(tmp_path: pathlib.Path) -> None:
+    path = tmp_path / 'states.bin'
+    path.write_bytes(b'')
+    with pytest.raises(SnapshotError):
+        SnapshotStore(str(path))
+    path.write_bytes(b'hello, world, this is not a snapshot')
+    with pytest.raises(SnapshotError):
+        SnapshotStore(str(path))
+    save_states(str(path), {1: b'state'})
+    path.write_bytes(path.read_bytes()[:-1])
+    with pytest.raises(SnapshotError):
+        SnapshotStore(str(path))
+    save_chat_bot(ChatBot(print), str(path))
+    with pytest.raises(SnapshotError):
+        SnapshotStore(str(path))
+
+
+def test_tictactoe_survives_restart(mocker: pytest_mock.MockFixture,
+                                    tmp_path: pathlib.Path) -> None:
+    path = str(tmp_path / 'states.bin')
+    send_message = mocker.stub(name='send_message_stub')
+    bot = UserIndependentBot(send_message, TicTacToeUserHandler)
+    for user_id, message in [(1, 'start'), (1, 'X 0 0'), (1, 'O 1 1'), (2, 'start'),
+                             (3, 'hi')]:
+        bot.handle_message(user_id, message)
+    save_bot(bot, path)
+    assert (tmp_path / 'states.bin').stat().st_size < 100
+
+    send_message.reset_mock()
+    store = SnapshotStore(path)
+    assert sorted(store) == [1, 2]
+    bot = UserIndependentBot(send_message, TicTacToeUserHandler, state_store=store)
+    bot.handle_message(1, 'X 2 2')
+    bot.handle_message(2, 'O 0 0')
+    bot.handle_message(3, 'X 0 0')
+    assert send_message.call_args_list == [
+        mocker.call(1, 'X..\n.O.\n..X'),
+        mocker.call(2, 'Invalid turn'),
+        mocker.call(3, 'Game is not started'),
+    ]
+    assert len(store) == 0
+
+
+def test_chat_bot(tmp_path: pathlib.Path) -> None:
+    path = str(tmp_path / 'chat.bin')
+    bot = ChatBot(print)
+    bot.users = dict.fromkeys([10, 3, 7])
+    save_chat_bot(bot, path)
+    restored = ChatBot(print)
+    load_chat_bot(restored, path)
+    assert list(restored.users) == [10, 3, 7]
@@ -8,62 +8,82 @@ class Player(Enum):
     O = 2  # noqa: disable=E741
 
 
+# Клетка (row, col) соответствует биту row * 3 + col.
+FULL_MASK = 0b111111111
+WIN_MASKS = (
+    0b000000111, 0b000111000, 0b111000000,  # Строки.
+    0b001001001, 0b010010010, 0b100100100,  # Столбцы.
+    0b100010001, 0b001010100,  # Диагонали.
+)
+# Для каждой клетки -- линии, проходящие через неё: после хода достаточно проверить их.
+CELL_WIN_MASKS = tuple(tuple(mask for mask in WIN_MASKS if mask >> cell & 1) for cell in range(9))
+
+
+def is_win(bits: int) -> bool:
+    """Возвращает True, если в множестве клеток bits есть целая линия."""
+    return any(bits & mask == mask for mask in WIN_MASKS)
+
+
 class TicTacToe:
-    """Класс, представляющий собой одну игру в крестики-нолики 3x3 для двух игроков."""
+    """Класс, представляющий собой одну игру в крестики-нолики 3x3 для двух игроков.
+    Клетки каждого игрока хранятся как 9-битная маска, количество ходов и победитель
+    обновляются при каждом ходе, так что все методы работают за O(1)."""
+    __slots__ = ('x_bits', 'o_bits', 'moves', 'winner_player')
+
     def __init__(self) -> None:
         """Конструктор, создаёт пустое поле 3x3."""
-        self.field: List[List[Optional[Player]]] = [
-            [None, None, None],
-            [None, None, None],
-            [None, None, None]
-        ]
+        self.x_bits = 0
+        self.o_bits = 0
+        self.moves = 0
+        self.winner_player: Optional[Player] = None
+
+    @classmethod
+    def from_bits(cls, x_bits: int, o_bits: int) -> 'TicTacToe':
+        """Восстанавливает игру по маскам клеток игроков."""
+        assert not x_bits & o_bits
+        game = cls()
+        game.x_bits = x_bits
+        game.o_bits = o_bits
+        game.moves = bin(x_bits | o_bits).count('1')
+        if is_win(x_bits):
+            game.winner_player = Player.X
+        elif is_win(o_bits):
+            game.winner_player = Player.O
+        return game
+
+    @property
+    def field(self) -> List[List[Optional[Player]]]:
+        """Поле в виде списка строк, только для чтения."""
+        return [[self.cell(row, col) for col in range(3)] for row in range(3)]
+
+    def cell(self, row: int, col: int) -> Optional[Player]:
+        """Возвращает игрока, занявшего клетку (row, col), или None."""
+        bit = 1 << (row * 3 + col)
+        if self.x_bits & bit:
+            return Player.X
+        if self.o_bits & bit:
+            return Player.O
+        return None
 
     def winner(self) -> Optional[Player]:
         """Возвращает победителя или None, если никто не выиграл."""
-        if self.field[0][0] and (self.field[0][0] ==
-                                 self.field[1][1] ==
-                                 self.field[2][2]):
-            return self.field[1][1]
-        if self.field[2][0] and (self.field[2][0] ==
-                                 self.field[1][1] ==
-                                 self.field[0][2]):
-            return self.field[1][1]
-        for row in range(3):
-            if self.field[row][0] and (self.field[row][0] ==
-                                       self.field[row][1] ==
-                                       self.field[row][2]):
-                return self.field[row][1]
-        for col in range(3):
-            if self.field[0][col] and (self.field[0][col] ==
-                                       self.field[1][col] ==
-                                       self.field[2][col]):
-                return self.field[1][col]
-        return None
+        return self.winner_player
 
     def is_finished(self) -> bool:
         """Возвращает True, если игра завершилась и False иначе."""
-        if self.winner():
-            return True
-        return all(None not in row for row in self.field)
+        return self.winner_player is not None or self.moves == 9
 
     def current_player(self) -> Optional[Player]:
         """Возвращает игрока, который ходит следующим. None, если все клетки заполнены."""
-        cnt_x = sum(sum(c == Player.X for c in row) for row in self.field)
-        cnt_o = sum(sum(c == Player.O for c in row) for row in self.field)
-        if cnt_x + cnt_o == 9:
+        if self.moves == 9:
             return None
-        if cnt_x == cnt_o:
-            return Player.X
-        elif cnt_x - 1 == cnt_o:
-            return Player.O
-        else:
-            assert False
+        return Player.O if self.moves & 1 else Player.X
 
     def can_make_turn(self, player: Player, *, row: int, col: int) -> bool:
         """Возвращает True, если игрок player может походить в клетку (row, col), False иначе."""
         assert 0 <= row < 3
         assert 0 <= col < 3
-        if self.field[row][col]:
+        if (self.x_bits | self.o_bits) >> (row * 3 + col) & 1:
             return False
         if self.is_finished():
             return False
@@ -72,4 +92,13 @@ class TicTacToe:
     def make_turn(self, player: Player, *, row: int, col: int) -> None:
         """Записывает ход игрока player в клетку (row, col). Проверяет ход на корректность."""
         assert self.can_make_turn(player, row=row, col=col)
-        self.field[row][col] = player
+        cell = row * 3 + col
+        if player == Player.X:
+            self.x_bits |= 1 << cell
+            bits = self.x_bits
+        else:
+            self.o_bits |= 1 << cell
+            bits = self.o_bits
+        self.moves += 1
+        if any(bits & mask == mask for mask in CELL_WIN_MASKS[cell]):
+            self.winner_player = player
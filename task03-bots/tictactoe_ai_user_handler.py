@@ -0,0 +1,20 @@
+from typing import Callable, Optional
+from tictactoe import Player
+from tictactoe_solver import Solver, default_solver
+from tictactoe_user_handler import TicTacToeUserHandler
+
+
+class TicTacToeAiUserHandler(TicTacToeUserHandler):
+    """Крестики-нолики против бота: пользователь играет за X, бот отвечает за O
+    лучшим ходом из таблицы решателя, так что на каждый ход перебор не нужен."""
+    def __init__(self, send_message: Callable[[str], None],
+                 solver: Optional[Solver] = None) -> None:
+        """solver -- решатель, по умолчанию общий для всех обработчиков."""
+        super(TicTacToeAiUserHandler, self).__init__(send_message)
+        self.solver = solver if solver is not None else default_solver()
+
+    def make_turn(self, player: Player, *, row: int, col: int) -> None:
+        super(TicTacToeAiUserHandler, self).make_turn(player, row=row, col=col)
+        if self.game is not None and self.game.current_player() == Player.O:
+            row, col = self.solver.best_move(self.game)
+            super(TicTacToeAiUserHandler, self).make_turn(Player.O, row=row, col=col)
@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+import sys
+import argparse
+from typing import Callable, Dict, List, NamedTuple, Optional
+import numpy as np
+from tictactoe import WIN_MASKS, Player, TicTacToe
+from tictactoe_solver import Solver, default_solver
+
+BATCH_SIZE = 1 << 16
+SEED = 123456
+NOBODY = 0
+CELLS = np.arange(9, dtype=np.uint16)
+WIN_MASKS_ARRAY = np.array(WIN_MASKS, dtype=np.uint16)
+
+# Стратегия получает маски клеток ходящего игрока и соперника для пачки игр
+# и возвращает номера клеток, куда ходить.
+Policy = Callable[[np.ndarray, np.ndarray, np.random.Generator], np.ndarray]
+
+
+class BatchResult(NamedTuple):
+    """Итоговые позиции пачки игр: маски клеток X и O и победитель (NOBODY или Player.value)."""
+    x_bits: np.ndarray
+    o_bits: np.ndarray
+    winners: np.ndarray
+
+
+def is_win(bits: np.ndarray) -> np.ndarray:
+    """Векторный tictactoe.is_win: для каждой маски -- есть ли в ней целая линия."""
+    return ((bits[:, None] & WIN_MASKS_ARRAY) == WIN_MASKS_ARRAY).any(axis=1)
+
+
+def random_policy(own: np.ndarray, other: np.ndarray, rng: np.random.Generator) -> np.ndarray:
+    """Ходит в случайную свободную клетку, все свободные клетки равновероятны."""
+    empty = ((own | other)[:, None] >> CELLS & 1) == 0
+    return np.where(empty, rng.random(empty.shape), -1).argmax(axis=1)
+
+
+def make_solver_policy(solver: Optional[Solver] = None) -> Policy:
+    """Стратегия, которая ходит как solver. Лучшие ходы всех достижимых позиций заранее
+    выписываются в массив, индексируемый маской ходящего игрока и маской соперника."""
+    solver = solver if solver is not None else default_solver()
+    table = np.full(1 << 18, -1, dtype=np.int8)
+    games = [TicTacToe()]
+    seen = set()
+    while games:
+        game = games.pop()
+        if game.is_finished() or (game.x_bits, game.o_bits) in seen:
+            continue
+        seen.add((game.x_bits, game.o_bits))
+        player = game.current_player()
+        assert player is not None
+        own, other = ((game.x_bits, game.o_bits) if player == Player.X
+                      else (game.o_bits, game.x_bits))
+        row, col = solver.best_move(game)
+        table[own | other << 9] = row * 3 + col
+        for cell in range(9):
+            if not (game.x_bits | game.o_bits) >> cell & 1:
+                child = TicTacToe.from_bits(game.x_bits, game.o_bits)
+                child.make_turn(player, row=cell // 3, col=cell % 3)
+                games.append(child)
+
+    def solver_policy(own: np.ndarray, other: np.ndarray,
+                      rng: np.random.Generator) -> np.ndarray:  # pylint: disable=W0613
+        return table[own.astype(np.int64) | other.astype(np.int64) << 9]
+    return solver_policy
+
+
+def play_batch(games: int, policy_x: Policy, policy_o: Policy,
+               rng: np.random.Generator) -> BatchResult:
+    """Играет games партий одновременно: на каждом шаге во всех незавершённых партиях
+    делается по одному ходу, так что номер хода у всех партий одинаковый."""
+    bits = [np.zeros(games, dtype=np.uint16), np.zeros(games, dtype=np.uint16)]
+    winners = np.full(games, NOBODY, dtype=np.int8)
+    active = np.arange(games)
+    for move in range(9):
+        side = move % 2
+        own, other = bits[side][active], bits[1 - side][active]
+        policy = policy_x if side == 0 else policy_o
+        cells = policy(own, other, rng).astype(np.uint16)
+        assert ((cells < 9) & ((own | other) >> cells & 1 == 0)).all(), 'invalid turn'
+        own = own | (1 << cells).astype(np.uint16)
+        bits[side][active] = own
+        won = is_win(own)
+        winners[active[won]] = (Player.X if side == 0 else Player.O).value
+        active = active[~won]
+    return BatchResult(bits[0], bits[1], winners)
+
+
+def simulate(games: int, policy_x: Policy, policy_o: Policy, seed: int,
+             batch_size: int = BATCH_SIZE) -> Dict[str, float]:
+    """Играет games партий пачками по batch_size и возвращает доли исходов
+    и среднюю длину партии."""
+    rng = np.random.default_rng(seed)
+    outcomes = np.zeros(3, dtype=np.int64)
+    moves = 0
+    for start in range(0, games, batch_size):
+        result = play_batch(min(batch_size, games - start), policy_x, policy_o, rng)
+        outcomes += np.bincount(result.winners, minlength=3)
+        moves += int(np.unpackbits((result.x_bits | result.o_bits).view(np.uint8)).sum())
+    return {
+        'games': games,
+        'x_wins': outcomes[Player.X.value] / games,
+        'o_wins': outcomes[Player.O.value] / games,
+        'draws': outcomes[NOBODY] / games,
+        'mean_moves': moves / games,
+    }
+
+
+def main(args_str: List[str]) -> None:
+    parser = argparse.ArgumentParser(description='Batched TicTacToe self-play.')
+    parser.add_argument('--games', type=int, default=1000000)
+    parser.add_argument('-x', choices=['random', 'solver'], default='random')
+    parser.add_argument('-o', choices=['random', 'solver'], default='random')
+    parser.add_argument('--seed', type=int, default=SEED)
+    parser.add_argument('--batch-size', type=int, default=BATCH_SIZE)
+    args = parser.parse_args(args_str)
+
+    policies: Dict[str, Policy] = {'random': random_policy}
+    if 'solver' in [args.x, args.o]:
+        policies['solver'] = make_solver_policy()
+    stats = simulate(args.games, policies[args.x], policies[args.o], args.seed, args.batch_size)
+    for name, value in stats.items():
+        print(f'{name}: {value}')
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
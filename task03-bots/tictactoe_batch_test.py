@@ -0,0 +1,46 @@
+import numpy as np
+import tictactoe
+from tictactoe import Player, TicTacToe
+import tictactoe_batch
+
+
+def test_is_win_matches_tictactoe() -> None:
+    masks = np.arange(512, dtype=np.uint16)
+    assert tictactoe_batch.is_win(masks).tolist() == [tictactoe.is_win(mask) for mask in range(512)]
+
+
+def test_random_games_are_valid() -> None:
+    result = tictactoe_batch.play_batch(2000, tictactoe_batch.random_policy,
+                                        tictactoe_batch.random_policy,
+                                        np.random.default_rng(1))
+    for x_bits, o_bits, winner in zip(*(array.tolist() for array in result)):
+        game = TicTacToe.from_bits(x_bits, o_bits)
+        assert game.is_finished()
+        game_winner = game.winner()
+        assert (game_winner.value if game_winner else tictactoe_batch.NOBODY) == winner
+        assert game.moves in [2 * bin(o_bits).count('1'), 2 * bin(o_bits).count('1') + 1]
+        # Победил тот, кто сделал последний ход.
+        assert not (winner == Player.X.value and game.moves % 2 == 0)
+        assert not (winner == Player.O.value and game.moves % 2 == 1)
+
+
+def test_simulate_random_vs_random() -> None:
+    stats = tictactoe_batch.simulate(20000, tictactoe_batch.random_policy,
+                                     tictactoe_batch.random_policy, seed=1, batch_size=3000)
+    # Точные вероятности: 0.585, 0.288, 0.127.
+    assert abs(stats['x_wins'] - 0.585) < 0.02
+    assert abs(stats['o_wins'] - 0.288) < 0.02
+    assert abs(stats['draws'] - 0.127) < 0.02
+    assert stats == tictactoe_batch.simulate(20000, tictactoe_batch.random_policy,
+                                             tictactoe_batch.random_policy, seed=1,
+                                             batch_size=3000)
+
+
+def test_solver_never_loses() -> None:
+    solver = tictactoe_batch.make_solver_policy()
+    stats = tictactoe_batch.simulate(5000, tictactoe_batch.random_policy, solver, seed=2)
+    assert stats['x_wins'] == 0
+    stats = tictactoe_batch.simulate(5000, solver, tictactoe_batch.random_policy, seed=2)
+    assert stats['o_wins'] == 0
+    stats = tictactoe_batch.simulate(10, solver, solver, seed=2)
+    assert stats['draws'] == 1
@@ -0,0 +1,100 @@
+from typing import Dict, List, Optional, Tuple
+from tictactoe import FULL_MASK, CELL_WIN_MASKS, Player, TicTacToe
+
+
+def make_symmetries() -> List[List[int]]:
+    """Возвращает 8 симметрий квадрата 3x3 как перестановки клеток: symmetry[cell] -- образ cell."""
+    symmetries = []
+    for mirrored in [False, True]:
+        for turns in range(4):
+            symmetry = []
+            for cell in range(9):
+                row, col = divmod(cell, 3)
+                if mirrored:
+                    col = 2 - col
+                for _ in range(turns):
+                    row, col = col, 2 - row
+                symmetry.append(row * 3 + col)
+            symmetries.append(symmetry)
+    return symmetries
+
+
+SYMMETRIES = make_symmetries()
+# MASK_IMAGES[s][mask] -- образ 9-битной маски клеток под действием симметрии s.
+MASK_IMAGES = [
+    [sum(1 << symmetry[cell] for cell in range(9) if mask >> cell & 1) for mask in range(512)]
+    for symmetry in SYMMETRIES
+]
+WIN_SCORE = 10
+
+
+def canonical(x_bits: int, o_bits: int) -> Tuple[int, int]:
+    """Возвращает ключ позиции, одинаковый для всех симметричных ей позиций,
+    и номер симметрии, переводящей позицию в каноническую."""
+    return min((images[x_bits] << 9 | images[o_bits], index)
+               for index, images in enumerate(MASK_IMAGES))
+
+
+class Solver:
+    """Полный перебор дерева игры (negamax) с таблицей транспозиций по каноническим позициям.
+    После построения таблиц лучший ход в любой позиции находится без перебора."""
+    def __init__(self) -> None:
+        # Оценка позиции для ходящего игрока: WIN_SCORE - число ходов при победе,
+        # минус то же при поражении, 0 при ничьей. Быстрые победы лучше медленных.
+        self.scores: Dict[int, int] = {}
+        # Лучший ход в канонической позиции, в её же координатах.
+        self.best_moves: Dict[int, int] = {}
+        self.negamax(0, 0, 0)
+
+    def negamax(self, own: int, other: int, moves: int) -> int:
+        """Оценивает позицию, где own -- клетки ходящего игрока, other -- соперника."""
+        key, _ = canonical(own, other)
+        if key in self.scores:
+            return self.scores[key]
+        best_score = -WIN_SCORE - 1
+        best_cell = -1
+        own, other = key >> 9, key & FULL_MASK
+        for cell in range(9):
+            if (own | other) >> cell & 1:
+                continue
+            new_own = own | 1 << cell
+            if any(new_own & mask == mask for mask in CELL_WIN_MASKS[cell]):
+                score = WIN_SCORE - moves - 1
+            elif moves + 1 == 9:
+                score = 0
+            else:
+                score = -self.negamax(other, new_own, moves + 1)
+            if score > best_score:
+                best_score, best_cell = score, cell
+        self.scores[key] = best_score
+        self.best_moves[key] = best_cell
+        return best_score
+
+    def best_move(self, game: TicTacToe) -> Tuple[int, int]:
+        """Возвращает (row, col) лучшего хода текущего игрока в незавершённой игре."""
+        assert not game.is_finished()
+        if game.current_player() == Player.X:
+            own, other = game.x_bits, game.o_bits
+        else:
+            own, other = game.o_bits, game.x_bits
+        key, symmetry = canonical(own, other)
+        cell = SYMMETRIES[symmetry].index(self.best_moves[key])
+        return divmod(cell, 3)
+
+    def score(self, game: TicTacToe) -> int:
+        """Оценка незавершённой игры для текущего игрока при идеальной игре обеих сторон."""
+        assert not game.is_finished()
+        if game.current_player() == Player.X:
+            return self.scores[canonical(game.x_bits, game.o_bits)[0]]
+        return self.scores[canonical(game.o_bits, game.x_bits)[0]]
+
+
+DEFAULT_SOLVER: Optional[Solver] = None
+
+
+def default_solver() -> Solver:
+    """Возвращает общий для всей программы решатель, строя таблицы при первом вызове."""
+    global DEFAULT_SOLVER
+    if DEFAULT_SOLVER is None:
+        DEFAULT_SOLVER = Solver()
+    return DEFAULT_SOLVER
@@ -0,0 +1,63 @@
+import itertools
+from typing import Optional
+from tictactoe import Player, TicTacToe
+from tictactoe_solver import SYMMETRIES, canonical, default_solver
+
+
+def test_symmetries_are_distinct_permutations() -> None:
+    assert len({tuple(symmetry) for symmetry in SYMMETRIES}) == 8
+    assert all(sorted(symmetry) == list(range(9)) for symmetry in SYMMETRIES)
+
+
+def test_canonical_is_symmetry_invariant() -> None:
+    corners = [1 << cell for cell in [0, 2, 6, 8]]
+    assert len({canonical(x_bits, 1 << 4)[0] for x_bits in corners}) == 1
+    assert canonical(1 << 0, 0) != canonical(1 << 1, 0)
+
+
+def test_positions_count() -> None:
+    # Известно, что с точностью до симметрий в игре 765 позиций, 138 из них -- конечные.
+    assert len(default_solver().scores) == 765 - 138
+
+
+def test_perfect_play_is_draw() -> None:
+    solver = default_solver()
+    game = TicTacToe()
+    assert solver.score(game) == 0
+    while not game.is_finished():
+        player = game.current_player()
+        assert player is not None
+        row, col = solver.best_move(game)
+        game.make_turn(player, row=row, col=col)
+    assert game.winner() is None
+
+
+def worst_result_against_solver(game: TicTacToe) -> Optional[Player]:
+    """Перебирает все ходы X против ходов решателя за O, возвращает лучший для X итог."""
+    if game.is_finished():
+        return game.winner()
+    if game.current_player() == Player.O:
+        row, col = default_solver().best_move(game)
+        game.make_turn(Player.O, row=row, col=col)
+        return worst_result_against_solver(game)
+    results = set()
+    for row, col in itertools.product(range(3), repeat=2):
+        if game.can_make_turn(Player.X, row=row, col=col):
+            child = TicTacToe()
+            child.x_bits, child.o_bits, child.moves = game.x_bits, game.o_bits, game.moves
+            child.make_turn(Player.X, row=row, col=col)
+            results.add(worst_result_against_solver(child))
+    return Player.X if Player.X in results else None
+
+
+def test_solver_never_loses() -> None:
+    assert worst_result_against_solver(TicTacToe()) is None
+
+
+def test_solver_takes_win() -> None:
+    game = TicTacToe()
+    for player, row, col in [(Player.X, 0, 0), (Player.O, 1, 0), (Player.X, 0, 1),
+                             (Player.O, 1, 1)]:
+        game.make_turn(player, row=row, col=col)
+    assert default_solver().best_move(game) == (0, 2)
+    assert default_solver().score(game) == 10 - 5
@@ -1,4 +1,6 @@
-from tictactoe import Player, TicTacToe
+import random
+from typing import List, Optional
+from tictactoe import Player, TicTacToe, is_win
 
 
 def test_game_draw() -> None:
@@ -139,3 +141,36 @@ def test_game_o_wins() -> None:
 
     assert game.is_finished()
     assert game.winner() is Player.O
+
+
+def naive_winner(field: List[List[Optional[Player]]]) -> Optional[Player]:
+    lines = [[(i, j) for j in range(3)] for i in range(3)]
+    lines += [[(j, i) for j in range(3)] for i in range(3)]
+    lines += [[(i, i) for i in range(3)], [(i, 2 - i) for i in range(3)]]
+    for line in lines:
+        cells = {field[row][col] for row, col in line}
+        if len(cells) == 1 and None not in cells:
+            return cells.pop()
+    return None
+
+
+def test_random_games_match_field() -> None:
+    rng = random.Random(2019)
+    for _ in range(300):
+        game = TicTacToe()
+        field: List[List[Optional[Player]]] = [[None] * 3 for _ in range(3)]
+        while not game.is_finished():
+            player = game.current_player()
+            assert player is not None
+            row, col = rng.choice([(row, col) for row in range(3) for col in range(3)
+                                   if field[row][col] is None])
+            game.make_turn(player, row=row, col=col)
+            field[row][col] = player
+            assert game.field == field
+            assert game.winner() == naive_winner(field)
+        assert is_win(game.x_bits) == (game.winner() == Player.X)
+        assert is_win(game.o_bits) == (game.winner() == Player.O)
+
+
+def test_no_instance_dict() -> None:
+    assert not hasattr(TicTacToe(), '__dict__')
@@ -1,6 +1,6 @@
 from typing import Callable, Optional
 from bot import UserHandler
-from tictactoe import Player, TicTacToe
+from tictactoe import FULL_MASK, Player, TicTacToe
 
 
 class TicTacToeUserHandler(UserHandler):
@@ -11,16 +11,50 @@ class TicTacToeUserHandler(UserHandler):
 
     def handle_message(self, message: str) -> None:
         """Обрабатывает очередное сообщение от пользователя."""
-        raise NotImplementedError
+        if message == 'start':
+            self.start_game()
+            return
+        if self.game is None:
+            self.send_message('Game is not started')
+            return
+        player, col, row = message.split()
+        self.make_turn(Player[player], row=int(row), col=int(col))
 
     def start_game(self) -> None:
         """Начинает новую игру в крестики-нолики и сообщает об этом пользователю."""
-        raise NotImplementedError
+        self.game = TicTacToe()
+        self.send_field()
 
     def make_turn(self, player: Player, *, row: int, col: int) -> None:
         """Обрабатывает ход игрока player в клетку (row, col)."""
-        raise NotImplementedError
+        assert self.game is not None
+        if not self.game.can_make_turn(player, row=row, col=col):
+            self.send_message('Invalid turn')
+            return
+        self.game.make_turn(player, row=row, col=col)
+        self.send_field()
+        if self.game.is_finished():
+            winner = self.game.winner()
+            if winner is None:
+                self.send_message('Game is finished, draw')
+            else:
+                self.send_message(f'Game is finished, {winner.name} wins')
+            self.game = None
+
+    def dump_state(self) -> Optional[bytes]:
+        """Упаковывает текущую игру в 3 байта: маски клеток X и O по 9 бит."""
+        if self.game is None:
+            return None
+        return (self.game.x_bits | self.game.o_bits << 9).to_bytes(3, 'little')
+
+    def load_state(self, state: bytes) -> None:
+        bits = int.from_bytes(state, 'little')
+        self.game = TicTacToe.from_bits(bits & FULL_MASK, bits >> 9)
 
     def send_field(self) -> None:
         """Отправляет пользователю сообщение с текущим состоянием игры."""
-        raise NotImplementedError
+        assert self.game is not None
+        self.send_message('\n'.join(
+            ''.join('.' if cell is None else cell.name for cell in row)
+            for row in self.game.field
+        ))
@@ -0,0 +1,91 @@
+import pytest_mock
+from tictactoe_ai_user_handler import TicTacToeAiUserHandler
+from tictactoe_user_handler import TicTacToeUserHandler
+
+
+def test_not_started(mocker: pytest_mock.MockFixture) -> None:
+    send_message = mocker.stub(name='send_message_stub')
+    bot = TicTacToeUserHandler(send_message)
+    bot.handle_message('hi')
+    bot.handle_message('X 1 1')
+    assert send_message.call_args_list == [
+        mocker.call('Game is not started'),
+        mocker.call('Game is not started'),
+    ]
+
+
+def test_readme_example(mocker: pytest_mock.MockFixture) -> None:
+    send_message = mocker.stub(name='send_message_stub')
+    bot = TicTacToeUserHandler(send_message)
+    for message in ['hi', 'X 1 1', 'start', 'X 1 1', 'O 0 1', 'O 0 0', 'start']:
+        bot.handle_message(message)
+    assert send_message.call_args_list == [
+        mocker.call('Game is not started'),
+        mocker.call('Game is not started'),
+        mocker.call('...\n...\n...'),
+        mocker.call('...\n.X.\n...'),
+        mocker.call('...\nOX.\n...'),
+        mocker.call('Invalid turn'),
+        mocker.call('...\n...\n...'),
+    ]
+
+
+def test_x_wins(mocker: pytest_mock.MockFixture) -> None:
+    send_message = mocker.stub(name='send_message_stub')
+    bot = TicTacToeUserHandler(send_message)
+    for message in ['start', 'X 0 0', 'O 0 1', 'X 1 0', 'O 1 1', 'X 2 0', 'X 2 2']:
+        bot.handle_message(message)
+    assert send_message.call_args_list == [
+        mocker.call('...\n...\n...'),
+        mocker.call('X..\n...\n...'),
+        mocker.call('X..\nO..\n...'),
+        mocker.call('XX.\nO..\n...'),
+        mocker.call('XX.\nOO.\n...'),
+        mocker.call('XXX\nOO.\n...'),
+        mocker.call('Game is finished, X wins'),
+        mocker.call('Game is not started'),
+    ]
+    assert bot.game is None
+
+
+def test_o_wins(mocker: pytest_mock.MockFixture) -> None:
+    send_message = mocker.stub(name='send_message_stub')
+    bot = TicTacToeUserHandler(send_message)
+    for message in ['start', 'X 0 0', 'O 2 0', 'X 1 0', 'O 1 1', 'X 2 2', 'O 0 2']:
+        bot.handle_message(message)
+    assert send_message.call_args_list == [
+        mocker.call('...\n...\n...'),
+        mocker.call('X..\n...\n...'),
+        mocker.call('X.O\n...\n...'),
+        mocker.call('XXO\n...\n...'),
+        mocker.call('XXO\n.O.\n...'),
+        mocker.call('XXO\n.O.\n..X'),
+        mocker.call('XXO\n.O.\nO.X'),
+        mocker.call('Game is finished, O wins'),
+    ]
+
+
+def test_draw(mocker: pytest_mock.MockFixture) -> None:
+    send_message = mocker.stub(name='send_message_stub')
+    bot = TicTacToeUserHandler(send_message)
+    moves = ['X 0 0', 'O 1 0', 'X 2 0', 'O 0 1', 'X 2 1', 'O 1 1', 'X 1 2', 'O 2 2', 'X 0 2']
+    for message in ['start'] + moves:
+        bot.handle_message(message)
+    assert send_message.call_args_list[-2:] == [
+        mocker.call('XOX\nOOX\nXXO'),
+        mocker.call('Game is finished, draw'),
+    ]
+    assert len(send_message.call_args_list) == 11
+
+
+def test_ai_opponent(mocker: pytest_mock.MockFixture) -> None:
+    send_message = mocker.stub(name='send_message_stub')
+    bot = TicTacToeAiUserHandler(send_message)
+    for message in ['start', 'X 1 1', 'O 0 0']:
+        bot.handle_message(message)
+    assert send_message.call_args_list == [
+        mocker.call('...\n...\n...'),
+        mocker.call('...\n.X.\n...'),
+        mocker.call('O..\n.X.\n...'),
+        mocker.call('Invalid turn'),
+    ]